@@ -0,0 +1,261 @@
+import os
+import json
+import asyncio
+import mimetypes
+import urllib.parse
+
+import visualize_genetics
+from graph_clusters import BadViewRequest, graph_view_payload
+from neighbor_index import neighbors_payload
+from ingest_pipeline import IngestPipeline
+
+MAX_HEADER_BYTES = 16384
+KEEP_ALIVE_TIMEOUT = 15
+
+STATUS_TEXT = {
+    200: 'OK',
+    301: 'Moved Permanently',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    500: 'Internal Server Error'
+}
+
+
+def json_response(payload, status=200):
+    """(status, headers, body) for a JSON reply with the same CORS header the threaded server sends"""
+    return status, {
+        'Content-type': 'application/json',
+        'Access-Control-Allow-Origin': '*'
+    }, json.dumps(payload).encode()
+
+
+def read_file(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def read_regular_file(path):
+    """Contents of `path`, or None if it is not a regular file"""
+    if not os.path.isfile(path):
+        return None
+    return read_file(path)
+
+
+class AsyncVisualizationServer:
+    """Single-threaded asyncio HTTP/1.1 server for the visualization routes
+
+    Connections are kept alive between requests, file reads run on the default
+    executor, and scrapes share one browser on the server's own event loop, so
+    many browser tabs and scrapes do not each cost a thread.
+    """
+
+    def __init__(self, host='', port=8000, root='.', pipeline=None, graph=None, clusters=None, neighbors=None):
+        self.host = host
+        self.port = port
+        self.root = os.path.abspath(root)
+        self.graph = graph
+        # Scrapes are saved and folded into the live graph by the pipeline's own stages
+        self.pipeline = pipeline or IngestPipeline(graph=graph)
+        self.clusters = clusters
+        self.neighbors = neighbors
+
+    async def serve_forever(self):
+        server = await asyncio.start_server(self.handle_connection, self.host or None, self.port, limit=MAX_HEADER_BYTES)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.pipeline.close()
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), KEEP_ALIVE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError):
+                    break
+
+                request_line, *header_lines = head.decode('latin-1').rstrip('\r\n').split('\r\n')
+                parts = request_line.split()
+                if len(parts) != 3:
+                    await self.send(writer, 400, {}, b'', keep_alive=False)
+                    break
+                method, path, version = parts
+
+                headers = {}
+                for line in header_lines:
+                    if ':' in line:
+                        key, value = line.split(':', 1)
+                        headers[key.strip().lower()] = value.strip()
+
+                # GET requests should not carry a body, but drain one so the next request parses cleanly
+                try:
+                    content_length = int(headers.get('content-length') or 0)
+                    if content_length < 0:
+                        raise ValueError(content_length)
+                except ValueError:
+                    await self.send(writer, 400, {}, b'', keep_alive=False)
+                    break
+                if content_length:
+                    await reader.readexactly(content_length)
+
+                if path == '/events' and method == 'GET':
+                    # The event stream owns the connection until the browser goes away
+                    await self.stream_events(writer)
+                    break
+
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+
+                status, response_headers, body = await self.dispatch(method, path)
+                await self.send(writer, status, response_headers, body, keep_alive, head_only=method == 'HEAD')
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def send(self, writer, status, headers, body, keep_alive, head_only=False):
+        lines = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}"]
+        headers = dict(headers, **{
+            'Content-Length': str(len(body)),
+            'Connection': 'keep-alive' if keep_alive else 'close'
+        })
+        if keep_alive:
+            headers['Keep-Alive'] = f"timeout={KEEP_ALIVE_TIMEOUT}"
+        lines.extend(f"{key}: {value}" for key, value in headers.items())
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        if not head_only:
+            writer.write(body)
+        await writer.drain()
+
+    async def stream_events(self, writer):
+        """Forward graph deltas to the browser as Server-Sent Events"""
+        if self.graph is None:
+            await self.send(writer, 404, {}, b'', keep_alive=False)
+            return
+
+        events = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+
+        def deliver(message):
+            # Deltas may be published from executor threads
+            loop.call_soon_threadsafe(events.put_nowait, message)
+
+        self.graph.broker.subscribe(deliver)
+        try:
+            writer.write(b'HTTP/1.1 200 OK\r\nContent-type: text/event-stream\r\n'
+                         b'Cache-Control: no-cache\r\nConnection: keep-alive\r\n\r\n')
+            await writer.drain()
+            while True:
+                try:
+                    message = await asyncio.wait_for(events.get(), KEEP_ALIVE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    message = ': keep-alive\n\n'
+                writer.write(message.encode())
+                await writer.drain()
+        finally:
+            self.graph.broker.unsubscribe(deliver)
+
+    async def dispatch(self, method, path):
+        print(f"\n{method} request: {path}")
+        if method not in ('GET', 'HEAD'):
+            return 405, {}, b''
+
+        if path == '/':
+            # Redirect root to visualization.html
+            return 301, {'Location': '/visualization.html'}, b''
+
+        if path == '/visualization.html':
+            try:
+                content = await asyncio.to_thread(read_file, os.path.join(self.root, 'visualization.html'))
+                print("✓ Served visualization.html")
+                return 200, {'Content-type': 'text/html'}, content
+            except Exception as e:
+                print(f"!!! Error serving visualization: {e}")
+                return 500, {}, b''
+
+        if path.startswith('/scrape/'):
+            return await self.handle_scrape(path)
+
+        if path.startswith('/strain_data/'):
+            return await self.handle_strain_data(path)
+
+        if urllib.parse.urlsplit(path).path == '/graph':
+            return await self.handle_graph(path)
+
+        if path.startswith('/neighbors/'):
+            return self.handle_neighbors(path)
+
+        return await self.handle_static(path)
+
+    async def handle_scrape(self, path):
+        try:
+            rsp = urllib.parse.unquote(path.split('/scrape/')[1])
+            print(f"Scraping strain with RSP: {rsp}")
+            job = await self.pipeline.ingest(rsp)
+            return json_response(visualize_genetics.scrape_payload(job))
+        except Exception as e:
+            print(f"Error during scraping: {str(e)}")
+            return json_response({'success': False, 'error': str(e)}, 500)
+
+    async def handle_strain_data(self, path):
+        try:
+            strain_name, rsp, include_summary = visualize_genetics.parse_strain_data_path(path)
+            print(f"\nRequested data for: {strain_name} (RSP: {rsp})")
+            strain_data = await asyncio.to_thread(visualize_genetics.get_strain_data, strain_name, rsp, include_summary)
+            if not strain_data:
+                raise Exception("Could not read strain data")
+            print("✓ Sent strain data")
+            return json_response({'success': True, 'data': strain_data})
+        except Exception as e:
+            print(f"!!! Error: {str(e)}")
+            return json_response({'success': False, 'error': str(e)}, 500)
+
+    async def handle_graph(self, path):
+        # Views copy every edge of a level, which is too much for the loop on large graphs
+        try:
+            if self.clusters is None:
+                raise Exception("Clustering is not available")
+            return json_response(await asyncio.to_thread(graph_view_payload, self.clusters, path))
+        except Exception as e:
+            print(f"!!! Error building graph view: {str(e)}")
+            return json_response({'success': False, 'error': str(e)}, 400 if isinstance(e, BadViewRequest) else 500)
+
+    def handle_neighbors(self, path):
+        # A dict hit and a slice of the memory-mapped arrays, so it runs on the loop too
+        try:
+            if self.neighbors is None:
+                raise Exception("Neighbour index is not available")
+            return json_response(neighbors_payload(self.neighbors, path))
+        except Exception as e:
+            print(f"!!! Error looking up neighbours: {str(e)}")
+            return json_response({'success': False, 'error': str(e)}, 500)
+
+    async def handle_static(self, path):
+        """Serve other files from the root directory, like SimpleHTTPRequestHandler does"""
+        relative = urllib.parse.unquote(urllib.parse.urlsplit(path).path).lstrip('/')
+        file_path = os.path.abspath(os.path.join(self.root, relative))
+        if os.path.commonpath([file_path, self.root]) != self.root:
+            return 404, {}, b''
+        # The existence check touches the disk too, so it runs off the loop with the read
+        content = await asyncio.to_thread(read_regular_file, file_path)
+        if content is None:
+            return 404, {}, b''
+        content_type = mimetypes.guess_type(file_path)[0] or 'application/octet-stream'
+        return 200, {'Content-type': content_type}, content
+
+
+def run_async_server(port=8000, graph=None, clusters=None, neighbors=None):
+    """Run the asyncio server until interrupted"""
+    server = AsyncVisualizationServer(port=port, graph=graph, clusters=clusters, neighbors=neighbors)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("\nShutting down server...")
@@ -0,0 +1,303 @@
+import os
+import math
+import json
+import time
+import shutil
+import tempfile
+import argparse
+import asyncio
+import random
+import threading
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from playwright.async_api import async_playwright
+
+import kaana_scraper
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def load_fixtures(fixtures_dir=FIXTURES_DIR):
+    """Load fixture strain pages and their expected strain_data dicts keyed by RSP"""
+    fixtures = {}
+    for file_name in sorted(os.listdir(fixtures_dir)):
+        if not file_name.endswith('.html'):
+            continue
+        rsp = file_name[:-len('.html')].lower()
+        with open(os.path.join(fixtures_dir, file_name), 'rb') as f:
+            page = f.read()
+        expected = None
+        expected_file = os.path.join(fixtures_dir, f"{rsp}.json")
+        if os.path.exists(expected_file):
+            with open(expected_file, 'r', encoding='utf-8') as f:
+                expected = json.load(f)
+        fixtures[rsp] = (page, expected)
+    return fixtures
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Serves fixture strain pages at /strains/<rsp> with simulated latency"""
+
+    def do_GET(self):
+        rsp = self.path.split('?')[0].rstrip('/').split('/')[-1].lower()
+        fixture = self.server.fixtures.get(rsp)
+        time.sleep(max(0.0, self.server.latency + random.uniform(-self.server.jitter, self.server.jitter)))
+
+        if not self.path.startswith('/strains/') or fixture is None:
+            self.send_error(404)
+            return
+
+        page, _ = fixture
+        self.send_response(200)
+        self.send_header('Content-type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(page)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(page)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stand_in(fixtures, latency=0.0, jitter=0.0, port=0):
+    """Start the kannapedia stand-in on a background thread and return (server, base_url)"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), StandInHandler)
+    server.fixtures = fixtures
+    server.latency = latency
+    server.jitter = jitter
+    server_thread = threading.Thread(target=server.serve_forever)
+    server_thread.daemon = True
+    server_thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/strains/"
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def process_tree_rss(root_pid=None):
+    """Summed RSS in bytes of every process descended from root_pid (default: this one), or None without /proc"""
+    root_pid = root_pid or os.getpid()
+    try:
+        pids = [int(entry) for entry in os.listdir('/proc') if entry.isdigit()]
+    except OSError:
+        return None
+
+    children = {}
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat", 'r') as f:
+                # The command name can contain spaces and parentheses; ppid is the second field after it
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(pid)
+
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    total = 0
+    pending = list(children.get(root_pid, []))
+    while pending:
+        pid = pending.pop()
+        pending += children.get(pid, [])
+        try:
+            with open(f"/proc/{pid}/statm", 'r') as f:
+                total += int(f.read().split()[1]) * page_size
+        except (OSError, IndexError, ValueError):
+            continue
+    return total
+
+
+async def sample_browser_rss(peak, interval=0.1):
+    """Keep peak['bytes'] at the largest summed RSS of the Playwright driver and browser processes seen so far
+
+    Chromium splits into browser, GPU and renderer processes, so the total is
+    sampled across the whole process tree while pages are open. Runs until
+    cancelled; peak['bytes'] stays None where /proc is not available.
+    """
+    while True:
+        rss = await asyncio.to_thread(process_tree_rss)
+        if rss is not None:
+            peak['bytes'] = max(peak['bytes'] or 0, rss)
+        await asyncio.sleep(interval)
+
+
+def peak_rss_mb(peak):
+    return None if peak['bytes'] is None else round(peak['bytes'] / 1024 / 1024, 1)
+
+
+async def run_extract_benchmark(base_url, fixtures, pages, concurrency):
+    """Load `pages` strain pages through one shared browser and check each extraction"""
+    rsps = list(fixtures.keys())
+    latencies = []
+    heap_peak = 0
+    mismatches = []
+    semaphore = asyncio.Semaphore(concurrency)
+    rss_peak = {'bytes': None}
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        sampler = asyncio.create_task(sample_browser_rss(rss_peak))
+
+        async def load_one(index):
+            nonlocal heap_peak
+            rsp = rsps[index % len(rsps)]
+            async with semaphore:
+                page = await browser.new_page()
+                try:
+                    cdp = await page.context.new_cdp_session(page)
+                    await cdp.send('Performance.enable')
+                    start = time.perf_counter()
+                    strain_data = await kaana_scraper.extract_strain_data(page, f"{base_url}{rsp}")
+                    latencies.append(time.perf_counter() - start)
+
+                    metrics = await cdp.send('Performance.getMetrics')
+                    for metric in metrics['metrics']:
+                        if metric['name'] == 'JSHeapUsedSize':
+                            heap_peak = max(heap_peak, metric['value'])
+
+                    expected = fixtures[rsp][1]
+                    if expected is not None and strain_data != expected:
+                        mismatches.append(rsp)
+                finally:
+                    await page.close()
+
+        start = time.perf_counter()
+        try:
+            await asyncio.gather(*(load_one(i) for i in range(pages)))
+        finally:
+            sampler.cancel()
+        elapsed = time.perf_counter() - start
+        await browser.close()
+
+    return {
+        'pages': pages,
+        'concurrency': concurrency,
+        'seconds': round(elapsed, 3),
+        'pages_per_sec': round(pages / elapsed, 2) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 1),
+        'js_heap_peak_mb': round(heap_peak / 1024 / 1024, 1),
+        'browser_peak_rss_mb': peak_rss_mb(rss_peak),
+        'mismatches': sorted(set(mismatches))
+    }
+
+
+async def run_scrape_benchmark(base_url, fixtures, pages):
+    """Run the full scrape_strain_data path (browser launch + file writes) against the stand-in"""
+    rsps = list(fixtures.keys())
+    latencies = []
+    failures = []
+    rss_peak = {'bytes': None}
+    original_dir = os.getcwd()
+    work_dir = tempfile.mkdtemp(prefix='kannapedia-scrape-bench-')
+    os.chdir(work_dir)
+    sampler = asyncio.create_task(sample_browser_rss(rss_peak))
+    try:
+        start = time.perf_counter()
+        for index in range(pages):
+            rsp = rsps[index % len(rsps)]
+            page_start = time.perf_counter()
+            try:
+                await kaana_scraper.scrape_strain_data(rsp, base_url)
+                latencies.append(time.perf_counter() - page_start)
+            except Exception:
+                failures.append(rsp)
+        elapsed = time.perf_counter() - start
+    finally:
+        sampler.cancel()
+        os.chdir(original_dir)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        'pages': pages,
+        'seconds': round(elapsed, 3),
+        'pages_per_sec': round(pages / elapsed, 2) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 1),
+        'browser_peak_rss_mb': peak_rss_mb(rss_peak),
+        'failures': sorted(set(failures))
+    }
+
+
+async def record_fixtures(rsp_numbers, fixtures_dir=FIXTURES_DIR):
+    """Save live kannapedia pages and their extracted strain_data as fixtures"""
+    os.makedirs(fixtures_dir, exist_ok=True)
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        page = await browser.new_page()
+        try:
+            for rsp in rsp_numbers:
+                rsp = rsp.lower()
+                strain_data = await kaana_scraper.extract_strain_data(page, f"{kaana_scraper.BASE_URL}{rsp}")
+                with open(os.path.join(fixtures_dir, f"{rsp}.html"), 'w', encoding='utf-8') as f:
+                    f.write(await page.content())
+                with open(os.path.join(fixtures_dir, f"{rsp}.json"), 'w', encoding='utf-8') as f:
+                    json.dump(strain_data, f, indent=2, ensure_ascii=False)
+                print(f"Recorded {rsp}: {strain_data['name']}")
+        finally:
+            await browser.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scraper offline against a local kannapedia stand-in")
+    parser.add_argument('--mode', choices=['extract', 'scrape'], default='extract',
+                        help='extract: shared browser, many pages; scrape: full scrape_strain_data per page')
+    parser.add_argument('--pages', type=int, default=50, help='Number of page loads')
+    parser.add_argument('--concurrency', type=int, default=4, help='Concurrent pages in extract mode')
+    parser.add_argument('--latency', type=float, default=0.1, help='Simulated server latency in seconds')
+    parser.add_argument('--jitter', type=float, default=0.02, help='Random +/- latency in seconds')
+    parser.add_argument('--fixtures', default=FIXTURES_DIR, help='Directory of <rsp>.html / <rsp>.json pairs')
+    parser.add_argument('--serve', action='store_true', help='Only run the stand-in server until Ctrl+C')
+    parser.add_argument('--port', type=int, default=0, help='Port for the stand-in (0 picks a free port)')
+    parser.add_argument('--record', nargs='+', metavar='RSP', help='Record live pages as new fixtures and exit')
+    parser.add_argument('--json', help='Also write the report to this file')
+    args = parser.parse_args()
+
+    if args.record:
+        asyncio.run(record_fixtures(args.record, args.fixtures))
+        return
+
+    fixtures = load_fixtures(args.fixtures)
+    if not fixtures:
+        print(f"No fixtures found in {args.fixtures}")
+        sys.exit(1)
+
+    server, base_url = start_stand_in(fixtures, args.latency, args.jitter, args.port)
+    print(f"Stand-in serving {len(fixtures)} fixture pages at {base_url}")
+
+    try:
+        if args.serve:
+            print("Press Ctrl+C to stop the server")
+            threading.Event().wait()
+
+        if args.mode == 'extract':
+            report = asyncio.run(run_extract_benchmark(base_url, fixtures, args.pages, args.concurrency))
+        else:
+            report = asyncio.run(run_scrape_benchmark(base_url, fixtures, args.pages))
+    except KeyboardInterrupt:
+        return
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    print("\n=== Scraper benchmark ===")
+    for key, value in report.items():
+        print(f"{key}: {value}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if report.get('mismatches') or report.get('failures'):
+        print("\n!!! Extraction did not match the expected fixtures")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
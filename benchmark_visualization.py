@@ -0,0 +1,224 @@
+import os
+import json
+import random
+import shutil
+import tempfile
+import argparse
+import time
+import tracemalloc
+import sys
+
+import visualize_genetics
+from strain_sinks import CsvDirSink
+
+DEFAULT_SIZES = [100, 1000, 10000, 50000]
+BASELINE_FILE = 'benchmark_baseline.json'
+
+# Terpene panel in the same spelling kannapedia uses on its chemistry tables
+TERPENE_PANEL = [
+    'MYRCENE', 'LIMONENE', 'BETA-CARYOPHYLLENE', 'ALPHA-PINENE', 'BETA-PINENE',
+    'TERPINOLENE', 'LINALOOL', 'ALPHA-HUMULENE', 'CARYOPHYLLENE OXIDE',
+    'ALPHA-BISABOLOL', 'TOTAL OCIMENE', 'GAMMA-TERPINENE'
+]
+CANNABINOID_PANEL = ['THC + THCA', 'CBD + CBDA', 'CBG + CBGA']
+
+
+def synthetic_strain(index):
+    """Return (name, rsp) for the synthetic strain at the given index"""
+    return f"Synth Strain {index:05d}", f"rsp{20000 + index}"
+
+
+def synthetic_strain_data(index, count, neighbours, terpene_density, rng):
+    """Build a strain_data dict shaped like the one kaana_scraper extracts from a page"""
+    name, _ = synthetic_strain(index)
+
+    relatives = []
+    for _ in range(min(neighbours, count - 1)):
+        other = rng.randrange(count - 1)
+        other = other + 1 if other >= index else other
+        other_name, other_rsp = synthetic_strain(other)
+        relatives.append({
+            'distance': round(rng.uniform(0.05, 0.55), 3),
+            'strain': other_name,
+            'rsp': other_rsp
+        })
+    relatives.sort(key=lambda rel: rel['distance'])
+
+    return {
+        'name': name,
+        'general_info': {
+            'Accession Date': 'January 20, 2016',
+            'Reported Plant Sex': rng.choice(['Female', 'Male']),
+            'Report Type': 'StrainSEEK v1',
+            'Reported Heterozygosity': f"{rng.uniform(0.5, 2.0):.4f}%",
+            'Rarity': rng.choice(['Common', 'Uncommon', 'Rare'])
+        },
+        'chemical_content': {
+            'cannabinoids': {c: f"{rng.uniform(0.1, 25.0):.1f}%" for c in CANNABINOID_PANEL},
+            'terpenoids': {
+                t: f"{rng.uniform(0.01, 1.5):.2f}%"
+                for t in TERPENE_PANEL if rng.random() < terpene_density
+            }
+        },
+        'genetic_relationships': {
+            'all_samples': relatives,
+            'base_tree': relatives,
+            'most_distant': []
+        },
+        'blockchain': {
+            'txid': f"{rng.getrandbits(256):064x}",
+            'shasum': f"{rng.getrandbits(256):064x}"
+        }
+    }
+
+
+def generate_corpus(output_dir, count, neighbours=20, terpene_density=0.6, seed=42):
+    """Generate a synthetic plants/ tree with `count` strains and return its path"""
+    rng = random.Random(seed)
+    plants_dir = os.path.join(output_dir, 'plants')
+    # Written through the scraper's own sink so the layout cannot drift from real scrapes
+    sink = CsvDirSink(plants_dir)
+    for index in range(count):
+        sink.write(synthetic_strain_data(index, count, neighbours, terpene_density, rng), synthetic_strain(index)[1])
+    return plants_dir
+
+
+def measure(func, *args):
+    """Run func twice and return (result, seconds, peak_bytes)
+
+    tracemalloc slows the traced code several times over, so the peak memory
+    comes from a traced run and the wall-clock time from a second, untraced
+    run. The traced run's result is dropped first so the two never coexist.
+    """
+    tracemalloc.start()
+    try:
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    return result, elapsed, peak
+
+
+def run_pipeline(plants_dir, max_quadratic, max_terpene):
+    """Time each visualization stage over a generated corpus"""
+    results = {}
+
+    def record(stage, seconds, peak):
+        results[stage] = {'seconds': round(seconds, 4), 'peak_mb': round(peak / 1024 / 1024, 2)}
+        print(f"  {stage:<34} {seconds:>9.3f}s {peak / 1024 / 1024:>10.1f} MB")
+
+    def skip(stage, n, flag, limit):
+        results[stage] = {'skipped': f"{n} strains exceeds {flag} {limit}"}
+        print(f"  {stage:<34} skipped ({n} strains)")
+
+    (strains_data, all_relationships), seconds, peak = measure(visualize_genetics.load_strain_data, plants_dir)
+    record('load_strain_data', seconds, peak)
+
+    n = len(strains_data)
+    if n <= max_quadratic:
+        _, seconds, peak = measure(visualize_genetics.create_distance_matrix, strains_data, all_relationships)
+        record('create_distance_matrix', seconds, peak)
+    else:
+        skip('create_distance_matrix', n, '--max-quadratic', max_quadratic)
+
+    # Terpene similarity is vectorized, so only the edge list it returns limits the size it can run at
+    complete = sum(1 for data in strains_data.values() if data['complete'])
+    if complete <= max_terpene:
+        terpene_relationships, seconds, peak = measure(visualize_genetics.calculate_terpene_relationships, strains_data)
+        record('calculate_terpene_relationships', seconds, peak)
+    else:
+        skip('calculate_terpene_relationships', complete, '--max-terpene', max_terpene)
+        terpene_relationships = []
+
+    _, seconds, peak = measure(
+        visualize_genetics.create_2d_visualization, strains_data, all_relationships, terpene_relationships
+    )
+    record('create_2d_visualization', seconds, peak)
+    return results
+
+
+def compare_to_baseline(report, baseline, tolerance):
+    """Return a list of human readable regressions against the baseline"""
+    regressions = []
+    for size, stages in report.items():
+        for stage, current in stages.items():
+            previous = baseline.get(size, {}).get(stage)
+            if not previous or 'seconds' not in current or 'seconds' not in previous:
+                continue
+            for metric in ['seconds', 'peak_mb']:
+                # Ignore noise on very small measurements
+                floor = 0.05 if metric == 'seconds' else 1.0
+                limit = max(previous[metric] * (1 + tolerance), previous[metric] + floor)
+                if current[metric] > limit:
+                    regressions.append(
+                        f"{size} strains / {stage}: {metric} {current[metric]} > baseline {previous[metric]}"
+                    )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the visualization pipeline on synthetic corpora")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='Strain counts to benchmark')
+    parser.add_argument('--neighbours', type=int, default=20, help='Relatives written per strain')
+    parser.add_argument('--terpene-density', type=float, default=0.6, help='Chance each panel terpene is reported')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--max-quadratic', type=int, default=2000,
+                        help='Skip the dense distance matrix when the loaded graph has more nodes than this')
+    parser.add_argument('--max-terpene', type=int, default=5000,
+                        help='Skip terpene similarity above this many scraped strains; synthetic profiles link '
+                             'about 10%% of pairs, so at 10000 the edge list and the page embedding it need '
+                             'several GB')
+    parser.add_argument('--baseline', default=BASELINE_FILE, help='Baseline JSON file')
+    parser.add_argument('--save-baseline', action='store_true', help='Write results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed slowdown fraction before failing')
+    parser.add_argument('--keep', help='Write corpora under this directory instead of a temp dir')
+    args = parser.parse_args()
+
+    # Output paths are relative to the caller, not to the directory changed into below
+    args.baseline = os.path.abspath(args.baseline)
+    if args.keep:
+        args.keep = os.path.abspath(args.keep)
+
+    # create_2d_visualization reads the template relative to the working directory
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    report = {}
+    for size in args.sizes:
+        work_dir = os.path.join(args.keep, str(size)) if args.keep else tempfile.mkdtemp(prefix='kannapedia-bench-')
+        try:
+            print(f"\n=== {size} strains ===")
+            start = time.perf_counter()
+            plants_dir = generate_corpus(work_dir, size, args.neighbours, args.terpene_density, args.seed)
+            print(f"  Generated corpus in {time.perf_counter() - start:.1f}s")
+            report[str(size)] = run_pipeline(plants_dir, args.max_quadratic, args.max_terpene)
+        finally:
+            if not args.keep:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved baseline to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"\n!!! No baseline at {args.baseline}; run with --save-baseline to create one")
+        sys.exit(1)
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare_to_baseline(report, baseline, args.tolerance)
+    if regressions:
+        print("\n!!! Performance regressions:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print("\nNo regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+import os
+import csv
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+MATRIX_CACHE_FILE = '.chemical_matrix.npz'
+# Below this many files the process pool costs more than it saves
+MIN_PARALLEL_FILES = 2000
+
+# Primary terpenes to focus on and the chemical names that map onto each
+PRIMARY_TERPENES = {
+    'myrcene': ['myrcene'],
+    'limonene': ['limonene', 'd-limonene'],
+    'caryophyllene': ['caryophyllene', 'β-caryophyllene', 'beta-caryophyllene'],
+    'pinene': ['α-pinene', 'beta-pinene', 'α-pinene', 'alpha-pinene'],
+    'terpinolene': ['terpinolene'],
+    'linalool': ['linalool'],
+    'humulene': ['humulene', 'α-humulene', 'alpha-humulene']
+}
+# Strains need at least 0.1% total primary terpenes to get terpene edges
+MIN_TERPENE_TOTAL = 0.1
+# Readings under 0.1% are trace amounts and do not count towards similarity
+TRACE_AMOUNT = 0.1
+# Terpene distances are rounded to this many decimals, below the float32 noise of the matrix
+DISTANCE_DECIMALS = 6
+
+
+def compound_key(name):
+    """Vocabulary entry for a chemical name as written in chemicals.csv"""
+    return ' '.join(name.strip().split())
+
+
+def parse_chemical_value(value, name=''):
+    """'18.1%' -> 18.1; unreadable values count as 0"""
+    value = (value or '0').strip().rstrip('%')
+    try:
+        return float(value)
+    except ValueError:
+        print(f"Warning: Could not convert value '{value}' to float for {name}")
+        return 0.0
+
+
+def read_chemicals_file(path):
+    """Parse a chemicals.csv into (type, name, value) tuples"""
+    readings = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            if row.get('Name'):
+                name = compound_key(row['Name'])
+                readings.append((row.get('Type', ''), name, parse_chemical_value(row.get('Value'), name)))
+    return readings
+
+
+def primary_terpene(name):
+    """PRIMARY_TERPENES group a terpenoid name belongs to, or None"""
+    name = name.lower()
+    for primary, variants in PRIMARY_TERPENES.items():
+        if any(variant in name for variant in variants):
+            return primary
+    return None
+
+
+class ChemicalMatrix:
+    """Dense float32 strains x compounds matrix of chemistry readings (percent), 0 where not reported"""
+
+    def __init__(self, strains, compounds, types, values):
+        self.strains = list(strains)
+        self.compounds = list(compounds)
+        self.types = list(types)
+        self.values = np.asarray(values, dtype=np.float32).reshape(len(self.strains), len(self.compounds))
+        self.index = {strain: row for row, strain in enumerate(self.strains)}
+        self.compound_index = {compound: column for column, compound in enumerate(self.compounds)}
+
+    @classmethod
+    def from_readings(cls, readings):
+        """Build from {strain: [(type, name, value), ...]}"""
+        compound_index = {}
+        types = []
+        for strain_readings in readings.values():
+            for chem_type, name, _ in strain_readings:
+                if name not in compound_index:
+                    compound_index[name] = len(compound_index)
+                    types.append(chem_type)
+
+        values = np.zeros((len(readings), len(compound_index)), dtype=np.float32)
+        for row, strain_readings in enumerate(readings.values()):
+            for _, name, value in strain_readings:
+                values[row, compound_index[name]] = value
+        return cls(readings.keys(), compound_index.keys(), types, values)
+
+    def row(self, strain):
+        """Readings for one strain, or None if it has no chemistry"""
+        index = self.index.get(strain)
+        return None if index is None else self.values[index]
+
+    def columns(self, chem_type):
+        return [column for column, compound_type in enumerate(self.types) if compound_type == chem_type]
+
+    def terpene_profiles(self):
+        """strains x PRIMARY_TERPENES matrix, summing every terpenoid that maps onto each group"""
+        groups = np.zeros((len(self.compounds), len(PRIMARY_TERPENES)), dtype=np.float32)
+        primaries = list(PRIMARY_TERPENES)
+        for column in self.columns('Terpenoid'):
+            primary = primary_terpene(self.compounds[column])
+            if primary is not None:
+                groups[column, primaries.index(primary)] = 1
+        return self.values @ groups
+
+    def save(self, path, fingerprint):
+        # Write next to the target and swap in, so a crash never leaves half a cache
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as f:
+            np.savez(f, strains=np.array(self.strains, dtype=str), compounds=np.array(self.compounds, dtype=str),
+                     types=np.array(self.types, dtype=str), values=self.values, fingerprint=np.array(fingerprint))
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path, fingerprint):
+        """Cached matrix at `path`, or None if it is missing or was built from other files"""
+        try:
+            with np.load(path) as cached:
+                if str(cached['fingerprint']) != fingerprint:
+                    return None
+                return cls(cached['strains'].tolist(), cached['compounds'].tolist(),
+                           cached['types'].tolist(), cached['values'])
+        except (OSError, KeyError, ValueError):
+            return None
+
+
+def chemicals_fingerprint(files):
+    """Hash of every chemicals.csv path, size and mtime, to tell whether a cached matrix is stale"""
+    digest = hashlib.sha1()
+    for strain, path in sorted(files.items()):
+        stat = os.stat(path)
+        digest.update(f"{strain}\0{path}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def build_chemical_matrix(files, workers=None):
+    """Parse {strain: chemicals.csv path} into a ChemicalMatrix, across processes for large corpora"""
+    paths = list(files.values())
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(paths) < MIN_PARALLEL_FILES:
+        parsed = [read_chemicals_file(path) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parsed = list(executor.map(read_chemicals_file, paths, chunksize=max(1, len(paths) // (workers * 4))))
+    return ChemicalMatrix.from_readings(dict(zip(files.keys(), parsed)))
+
+
+def load_chemical_matrix(files, cache_path=None, workers=None):
+    """ChemicalMatrix for {strain: chemicals.csv path}, reusing the on-disk cache while the files are unchanged"""
+    if cache_path is None:
+        return build_chemical_matrix(files, workers)
+
+    fingerprint = chemicals_fingerprint(files)
+    matrix = ChemicalMatrix.load(cache_path, fingerprint)
+    if matrix is not None:
+        print(f"Loaded chemical matrix from {cache_path}")
+        return matrix
+
+    matrix = build_chemical_matrix(files, workers)
+    print(f"Parsed {len(matrix.strains)} chemical profiles into {len(matrix.compounds)} compounds")
+    try:
+        matrix.save(cache_path, fingerprint)
+    except OSError as e:
+        print(f"Warning: Could not cache chemical matrix: {e}")
+    return matrix
+
+
+def terpene_distances(profile, profiles):
+    """Weighted terpene distance from one profile to each row of `profiles` (0 = identical)
+
+    Only terpenes above a trace amount in either strain count, each weighted by
+    the larger of the two readings. Rows with nothing to compare are NaN.
+
+    Readings are stored as float32, so a pair whose exact distance is a round
+    value like 0.5 can come out a hair either side of it. Rounding keeps strict
+    threshold tests giving the same answer as the exact decimal readings.
+    """
+    profile = np.asarray(profile, dtype=np.float64)
+    profiles = np.asarray(profiles, dtype=np.float64)
+    max_val = np.maximum(profiles, profile)
+    weight = np.where(max_val >= TRACE_AMOUNT, max_val, 0.0)
+    similarity = 1 - np.abs(profiles - profile) / np.maximum(max_val, TRACE_AMOUNT)
+    total_weight = weight.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        distances = 1 - (similarity * weight).sum(axis=1) / total_weight
+    distances[total_weight == 0] = np.nan
+    return np.round(distances, DISTANCE_DECIMALS)
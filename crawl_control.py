@@ -0,0 +1,166 @@
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+
+# HTTP statuses that mean "slow down" rather than "this page is broken"
+THROTTLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Async token bucket: at most `rate` acquisitions per second with bursts up to `burst`"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        async with self.lock:
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+
+class AimdWindow:
+    """Concurrency limit that grows additively on fast successes and shrinks multiplicatively on trouble"""
+
+    def __init__(self, initial=2, minimum=1, maximum=16, decrease_factor=0.5):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease_factor = decrease_factor
+        self.in_flight = 0
+        self.condition = asyncio.Condition()
+
+    async def acquire(self):
+        async with self.condition:
+            while self.in_flight >= int(self.limit):
+                await self.condition.wait()
+            self.in_flight += 1
+
+    async def release(self):
+        async with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def increase(self):
+        # Roughly +1 slot per full window of successes
+        self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+    def decrease(self, factor=None):
+        self.limit = max(self.minimum, self.limit * (factor or self.decrease_factor))
+
+
+class RetryableError(Exception):
+    """Raised for failures worth retrying; `retry_after` is an optional server-requested delay"""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def backoff_delay(attempt, base=1.0, cap=60.0):
+    """Full-jitter exponential backoff for the given 0-based attempt"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class CrawlController:
+    """Paces requests with a token bucket and an AIMD concurrency window, retrying with jittered backoff
+
+    Successes faster than `target_latency` grow both the window and the request
+    rate; slow responses shrink the window, and timeouts or 429/5xx responses
+    halve the window and the rate before the request is retried.
+    """
+
+    def __init__(self, rate=1.0, max_rate=5.0, initial_concurrency=2, max_concurrency=8,
+                 target_latency=5.0, retries=4, backoff_base=1.0, backoff_cap=60.0,
+                 timeout_errors=(asyncio.TimeoutError,)):
+        self.bucket = TokenBucket(rate, burst=max(1, initial_concurrency))
+        self.window = AimdWindow(initial_concurrency, 1, max_concurrency)
+        self.min_rate = min(rate, 0.1)
+        self.max_rate = max_rate
+        self.target_latency = target_latency
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.timeout_errors = timeout_errors
+        self.last_decrease = 0.0
+        self.stats = {'requests': 0, 'successes': 0, 'retries': 0, 'throttled': 0, 'timeouts': 0, 'failures': 0}
+
+    @asynccontextmanager
+    async def slot(self):
+        """Wait for a concurrency slot and a rate token"""
+        await self.window.acquire()
+        try:
+            await self.bucket.acquire()
+            yield
+        finally:
+            await self.window.release()
+
+    def on_success(self, latency):
+        self.stats['successes'] += 1
+        if latency <= self.target_latency:
+            self.window.increase()
+            self.bucket.rate = min(self.max_rate, self.bucket.rate + 0.1)
+        else:
+            self._back_off(0.8, adjust_rate=False)
+
+    def on_trouble(self):
+        self._back_off(self.window.decrease_factor, adjust_rate=True)
+
+    def _back_off(self, factor, adjust_rate):
+        # Many in-flight requests fail together; only react once per target latency
+        now = time.monotonic()
+        if now - self.last_decrease < self.target_latency:
+            return
+        self.last_decrease = now
+        self.window.decrease(factor)
+        if adjust_rate:
+            self.bucket.rate = max(self.min_rate, self.bucket.rate * factor)
+
+    async def run(self, request):
+        """Call the `request` coroutine factory under the controller, retrying transient failures"""
+        for attempt in range(self.retries + 1):
+            self.stats['requests'] += 1
+            retry_after = None
+            async with self.slot():
+                start = time.monotonic()
+                try:
+                    result = await request()
+                except self.timeout_errors as e:
+                    self.stats['timeouts'] += 1
+                    error = e
+                except RetryableError as e:
+                    self.stats['throttled'] += 1
+                    retry_after = e.retry_after
+                    error = e
+                else:
+                    self.on_success(time.monotonic() - start)
+                    return result
+            self.on_trouble()
+
+            if attempt == self.retries:
+                break
+            self.stats['retries'] += 1
+            delay = backoff_delay(attempt, self.backoff_base, self.backoff_cap)
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+            print(f"Retrying in {delay:.1f}s after: {str(error)}")
+            await asyncio.sleep(delay)
+
+        self.stats['failures'] += 1
+        raise error
+
+    def describe(self):
+        return (f"concurrency {self.window.limit:.1f}, rate {self.bucket.rate:.2f}/s, "
+                + ', '.join(f"{key} {value}" for key, value in self.stats.items()))
@@ -0,0 +1,256 @@
+import bisect
+import threading
+import urllib.parse
+
+import networkx as nx
+
+CLUSTER_COLOR = {'background': '#9C27B0', 'border': '#6A1B9A'}
+# How many member names to list in a cluster's tooltip
+TOOLTIP_MEMBERS = 8
+
+
+class BadViewRequest(Exception):
+    """Raised for /graph queries naming a level or cluster that cannot exist; the servers answer 400"""
+
+
+def cluster_id(level, index):
+    return f"cluster-{level}-{index}"
+
+
+def parse_cluster_id(value):
+    """Inverse of cluster_id: returns (level, index)"""
+    parts = value.split('-')
+    if len(parts) != 3 or parts[0] != 'cluster' or not parts[1].isdigit() or not parts[2].isdigit():
+        raise BadViewRequest(f"Malformed cluster id: {value}")
+    return int(parts[1]), int(parts[2])
+
+
+class ClusterHierarchy:
+    """Louvain community hierarchy over the genetic graph, served at any level of detail
+
+    Level 0 is the individual strains. Level k groups the nodes by the k-th
+    Louvain aggregation pass, so every cluster at level k+1 is a union of
+    clusters at level k and a cluster can be drilled into one level at a time.
+    Edges between units are merged, keeping the closest distance and a count,
+    and each merged edge is also filed under the cluster one level up that
+    contains both ends, so drilling in is a lookup rather than a subgraph walk.
+
+    Louvain only runs here, at startup. LiveGraph deltas add strains to the
+    cluster of their closest already-placed relative (or a cluster of their
+    own) and merge their edges in, so the view stays current without
+    re-optimizing the communities.
+    """
+
+    def __init__(self, nodes, relationships, seed=42):
+        self.nodes = {node['id']: node for node in nodes}
+        self.lock = threading.Lock()
+
+        graph = nx.Graph()
+        graph.add_nodes_from(self.nodes)
+        for rel in relationships:
+            strain1, strain2, distance = rel['from'], rel['to'], rel['distance']
+            if strain1 == strain2 or strain1 not in self.nodes or strain2 not in self.nodes:
+                continue
+            if graph.has_edge(strain1, strain2) and graph[strain1][strain2]['distance'] <= distance:
+                continue
+            # Closer strains pull harder on the community detection
+            graph.add_edge(strain1, strain2, distance=distance, weight=max(1e-6, 1 - distance))
+        self.graph = graph
+
+        partitions = []
+        if graph.number_of_edges():
+            partitions = list(nx.community.louvain_partitions(graph, weight='weight', seed=seed))
+
+        # membership[k][node] is the node's cluster index at level k + 1
+        self.membership = []
+        self.members = []
+        for partition in partitions:
+            communities = [sorted(community) for community in partition]
+            self.members.append(communities)
+            self.membership.append({node: index for index, community in enumerate(communities) for node in community})
+
+        self.top_level = len(partitions)
+        # level_edges[k] maps a unit pair to its merged edge at level k;
+        # inner_edges[k][index] holds the level k edges inside cluster `index` of level k + 1
+        self.level_edges = [{} for _ in range(self.top_level + 1)]
+        self.inner_edges = [{} for _ in range(self.top_level)]
+        for strain1, strain2, data in graph.edges(data=True):
+            self.merge_edge(strain1, strain2, data['distance'], new=True)
+        print(f"Built {self.top_level} cluster levels: "
+              + ', '.join(f"level {level + 1}: {len(communities)}" for level, communities in enumerate(self.members)))
+
+    def unit_of(self, node, level):
+        """Id of the node or cluster that contains `node` at `level`"""
+        if level == 0:
+            return node
+        return cluster_id(level, self.membership[level - 1][node])
+
+    def merge_edge(self, strain1, strain2, distance, new):
+        """Fold a strain edge into the merged edges of every level where its ends are in different units"""
+        for level in range(self.top_level + 1):
+            unit1, unit2 = self.unit_of(strain1, level), self.unit_of(strain2, level)
+            if unit1 == unit2:
+                # Both ends share a cluster from here up
+                break
+            key = (unit1, unit2) if unit1 < unit2 else (unit2, unit1)
+            edge = self.level_edges[level].get(key)
+            if edge is None:
+                edge = {'from': key[0], 'to': key[1], 'distance': distance, 'count': 0}
+                self.level_edges[level][key] = edge
+                if level < self.top_level:
+                    parent = self.membership[level][strain1]
+                    if parent == self.membership[level][strain2]:
+                        self.inner_edges[level].setdefault(parent, {})[key] = edge
+            if new:
+                edge['count'] += 1
+            edge['distance'] = min(edge['distance'], distance)
+
+    def place(self, node, neighbor=None):
+        """Put a new node in `neighbor`'s cluster at every level, or in new clusters of its own"""
+        for level in range(self.top_level):
+            if neighbor is None:
+                index = len(self.members[level])
+                self.members[level].append([node])
+            else:
+                index = self.membership[level][neighbor]
+                bisect.insort(self.members[level][index], node)
+            self.membership[level][node] = index
+
+    def apply_delta(self, delta):
+        """Fold a LiveGraph delta's nodes and genetic edges into the hierarchy"""
+        with self.lock:
+            pending = []
+            for node in delta['nodes']:
+                if node['id'] not in self.nodes:
+                    self.graph.add_node(node['id'])
+                    pending.append(node['id'])
+                self.nodes[node['id']] = node
+
+            relationships = [
+                rel for rel in delta['relationships']
+                if rel['from'] != rel['to'] and rel['from'] in self.nodes and rel['to'] in self.nodes
+            ]
+            if self.top_level:
+                # New relatives of a new strain only link to that strain, so keep passing until nothing moves
+                placed = self.membership[0]
+                while pending:
+                    remaining = []
+                    for node in pending:
+                        closest = None
+                        for rel in relationships:
+                            other = rel['to'] if rel['from'] == node else rel['from'] if rel['to'] == node else None
+                            if other in placed and (closest is None or rel['distance'] < closest[0]):
+                                closest = (rel['distance'], other)
+                        if closest is None:
+                            remaining.append(node)
+                        else:
+                            self.place(node, closest[1])
+                    if len(remaining) == len(pending):
+                        for node in remaining:
+                            self.place(node)
+                        break
+                    pending = remaining
+
+            for rel in relationships:
+                strain1, strain2, distance = rel['from'], rel['to'], rel['distance']
+                if self.graph.has_edge(strain1, strain2):
+                    if self.graph[strain1][strain2]['distance'] <= distance:
+                        continue
+                    self.graph[strain1][strain2]['distance'] = distance
+                    self.merge_edge(strain1, strain2, distance, new=False)
+                else:
+                    self.graph.add_edge(strain1, strain2, distance=distance, weight=max(1e-6, 1 - distance))
+                    self.merge_edge(strain1, strain2, distance, new=True)
+
+    def cluster_node(self, level, index):
+        members = self.members[level - 1][index]
+        if len(members) == 1:
+            # A one-strain cluster is shown as the strain itself
+            return self.nodes[members[0]]
+        complete = sum(1 for node in members if self.nodes[node]['complete'])
+        names = ', '.join(members[:TOOLTIP_MEMBERS]) + (', ...' if len(members) > TOOLTIP_MEMBERS else '')
+        return {
+            'id': cluster_id(level, index),
+            'label': f"{len(members)} strains",
+            'title': f"Cluster of {len(members)} strains ({complete} with full data)<br>{names}<br>Double-click to expand",
+            'color': CLUSTER_COLOR,
+            'value': len(members),
+            'cluster': True,
+            'level': level,
+            'complete': False
+        }
+
+    def units(self, members, level):
+        if level == 0:
+            return list(members)
+        return sorted({self.membership[level - 1][node] for node in members})
+
+    def view(self, level=None, cluster=None):
+        """Nodes and merged edges at `level`, optionally only the contents of one cluster
+
+        Drilling into a cluster at level L returns its units at the highest
+        level below L where it splits into more than one, so a double-click
+        never opens onto a single node. The default view skips single-cluster
+        top levels the same way.
+        """
+        with self.lock:
+            if cluster is not None:
+                parent_level, parent_index = parse_cluster_id(cluster)
+                if not 1 <= parent_level <= self.top_level or parent_index >= len(self.members[parent_level - 1]):
+                    raise BadViewRequest(f"Unknown cluster: {cluster}")
+                members = self.members[parent_level - 1][parent_index]
+                level = parent_level - 1
+            else:
+                members = self.nodes
+                if level is None:
+                    level = self.top_level
+                    while level > 0 and len(self.members[level - 1]) == 1:
+                        level -= 1
+                else:
+                    level = max(0, min(level, self.top_level))
+
+            units = self.units(members, level)
+            if cluster is not None:
+                while level > 0 and len(units) == 1:
+                    level -= 1
+                    units = self.units(members, level)
+                # Every level between here and the clicked cluster held just this one unit
+                parent = self.membership[level][members[0]]
+                edges = self.inner_edges[level].get(parent, {}).values()
+            else:
+                edges = self.level_edges[level].values()
+
+            if level == 0:
+                nodes = [self.nodes[node] for node in units]
+            else:
+                nodes = [self.cluster_node(level, index) for index in units]
+
+            relationships = [dict(edge) for edge in edges]
+            if level > 0:
+                # Point edges of one-strain clusters at the strain node that stands in for them
+                singles = {
+                    cluster_id(level, index): self.members[level - 1][index][0]
+                    for index in units if len(self.members[level - 1][index]) == 1
+                }
+                for edge in relationships:
+                    edge['from'] = singles.get(edge['from'], edge['from'])
+                    edge['to'] = singles.get(edge['to'], edge['to'])
+
+            return {
+                'level': level,
+                'top_level': self.top_level,
+                'nodes': nodes,
+                'relationships': relationships
+            }
+
+
+def graph_view_payload(clusters, path):
+    """JSON payload for a /graph?level=N or /graph?cluster=<id> request"""
+    query = urllib.parse.parse_qs(urllib.parse.urlsplit(path).query)
+    level = None
+    if 'level' in query:
+        if not query['level'][0].isdigit():
+            raise BadViewRequest(f"Malformed level: {query['level'][0]}")
+        level = int(query['level'][0])
+    cluster = query['cluster'][0] if 'cluster' in query else None
+    return dict(clusters.view(level, cluster), success=True)
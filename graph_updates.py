@@ -0,0 +1,146 @@
+import json
+import threading
+
+import numpy as np
+
+from chemistry import build_chemical_matrix, terpene_distances
+from visualize_genetics import (
+    read_strain_folder, choose_representatives, build_node, chemical_files,
+    terpene_profile, terpene_profiles, TERPENE_DISTANCE_THRESHOLD
+)
+
+GRAPH_DELTA_EVENT = 'graph-delta'
+
+
+class GraphEventBroker:
+    """Fans Server-Sent Events out to every connected browser
+
+    Subscribers are callables taking the encoded event text, so the threaded
+    server can hand in a queue's put and the asyncio server a thread-safe
+    call onto its loop.
+    """
+
+    def __init__(self):
+        self.subscribers = set()
+        self.lock = threading.Lock()
+
+    def subscribe(self, callback):
+        with self.lock:
+            self.subscribers.add(callback)
+
+    def unsubscribe(self, callback):
+        with self.lock:
+            self.subscribers.discard(callback)
+
+    def publish(self, event, payload):
+        message = f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for callback in subscribers:
+            callback(message)
+
+
+class LiveGraph:
+    """Server-side copy of the graph sent to the browser, grown one scraped strain at a time
+
+    Applying a scrape only reads that strain's folder and touches its own
+    edges: genetic edges cost O(degree) and terpene edges one vectorized
+    comparison against the profile matrix. The resulting node/edge diff is
+    published to the broker instead of regenerating visualization.html.
+
+    Node ids are kept stable for the live page: if an RSP already has a node
+    under another name, the scraped strain updates that node.
+    """
+
+    def __init__(self, strains_data, all_relationships, terpene_relationships, broker=None, chemistry=None,
+                 neighbors=None, clusters=None):
+        self.strains_data = strains_data
+        self.broker = broker or GraphEventBroker()
+        # NeighborIndex and ClusterHierarchy to keep in step with the deltas, if the server has them
+        self.neighbors = neighbors
+        self.clusters = clusters
+        self.lock = threading.Lock()
+        self.representatives = {
+            rsp: rep['name'] for rsp, rep in choose_representatives(strains_data).items()
+        }
+
+        self.edge_keys = set()
+        for strain1, strain2, distance in all_relationships:
+            self.edge_keys.add((self.node_id(strain1), self.node_id(strain2), distance))
+
+        self.terpene_edge_keys = {(rel['from'], rel['to']) for rel in terpene_relationships}
+        if chemistry is None:
+            chemistry = build_chemical_matrix(chemical_files(strains_data))
+        # Row i of terpene_profiles belongs to terpene_names[i]
+        self.terpene_names, self.terpene_profiles = terpene_profiles(strains_data, chemistry)
+        self.terpene_rows = {name: row for row, name in enumerate(self.terpene_names)}
+
+    def node_id(self, strain_name, rsp=None):
+        """Id of the node that represents a strain in the browser"""
+        if rsp is None:
+            rsp = self.strains_data.get(strain_name, {}).get('rsp', '')
+        return self.representatives.get(rsp.upper(), strain_name) if rsp else strain_name
+
+    def apply_strain_folder(self, root, dir, readings=None):
+        """Fold a freshly scraped strain folder into the graph and publish the delta
+
+        `readings` are its already parsed chemicals, if the caller has them.
+        """
+        strain_name, info, relationships = read_strain_folder(root, dir)
+        delta = {'nodes': [], 'relationships': [], 'terpeneRelationships': []}
+
+        with self.lock:
+            rsp = info['rsp'].upper()
+            node = self.node_id(strain_name, rsp)
+            if rsp and rsp not in self.representatives:
+                self.representatives[rsp] = node
+            self.strains_data[node] = info
+            delta['nodes'].append(build_node(node, info))
+
+            for _, rel_strain, distance, rel_rsp in relationships:
+                rel_node = self.node_id(rel_strain, rel_rsp)
+                if rel_node not in self.strains_data:
+                    self.strains_data[rel_node] = {
+                        'complete': False,
+                        'rsp': rel_rsp,
+                        'dir_name': ''
+                    }
+                    if rel_rsp:
+                        self.representatives[rel_rsp.upper()] = rel_node
+                    delta['nodes'].append(build_node(rel_node, self.strains_data[rel_node]))
+
+                key = (node, rel_node, distance)
+                if key not in self.edge_keys:
+                    self.edge_keys.add(key)
+                    delta['relationships'].append({'from': node, 'to': rel_node, 'distance': distance})
+
+            profile = terpene_profile(info, readings)
+            if profile is not None:
+                distances = terpene_distances(profile, self.terpene_profiles)
+                for row in np.flatnonzero(distances < TERPENE_DISTANCE_THRESHOLD):
+                    other = self.terpene_names[row]
+                    if other == node:
+                        continue
+                    # Same from < to ordering as calculate_terpene_relationships
+                    strain1, strain2 = sorted([node, other])
+                    if (strain1, strain2) not in self.terpene_edge_keys:
+                        self.terpene_edge_keys.add((strain1, strain2))
+                        delta['terpeneRelationships'].append({
+                            'from': strain1, 'to': strain2, 'distance': float(distances[row])
+                        })
+                
+                if node in self.terpene_rows:
+                    self.terpene_profiles[self.terpene_rows[node]] = profile
+                else:
+                    self.terpene_rows[node] = len(self.terpene_names)
+                    self.terpene_names.append(node)
+                    self.terpene_profiles = np.vstack([self.terpene_profiles, profile])
+
+        print(f"Graph delta for {node}: {len(delta['nodes'])} nodes, "
+              f"{len(delta['relationships'])} edges, {len(delta['terpeneRelationships'])} terpene edges")
+        if self.neighbors is not None:
+            self.neighbors.apply_delta(delta)
+        if self.clusters is not None:
+            self.clusters.apply_delta(delta)
+        self.broker.publish(GRAPH_DELTA_EVENT, delta)
+        return delta
@@ -0,0 +1,245 @@
+import os
+import time
+import asyncio
+import threading
+
+from playwright.async_api import async_playwright
+
+from chemistry import compound_key, parse_chemical_value
+from kaana_scraper import (
+    BASE_URL, EXTRACT_STRAIN_DATA_JS, clean_rsp_number, create_controller, describe_strain_data, load_strain_page
+)
+from strain_sinks import CsvDirSink
+
+STAGES = ['fetch', 'normalize', 'store', 'index']
+# Workers per stage; fetch defaults to the controller's maximum window, which sets the real page concurrency.
+# Shared-file sinks (jsonl, consolidated) are not thread-safe, so store keeps a single writer unless told otherwise.
+DEFAULT_WORKERS = {'normalize': 2, 'store': 1, 'index': 1}
+# Jobs allowed to wait in front of each stage before the stage upstream blocks
+DEFAULT_QUEUE_SIZE = 8
+
+
+class IngestJob:
+    """One RSP number moving through the pipeline; the stages fill in its fields"""
+
+    def __init__(self, rsp_number):
+        self.rsp_number = rsp_number
+        self.future = asyncio.get_running_loop().create_future()
+        self.strain_data = None
+        self.readings = None
+        self.strain_dir = None
+        self.delta = None
+        self.started = time.monotonic()
+
+
+def normalize_strain_data(strain_data):
+    """Check an extracted record and parse its chemistry into (type, name, value) readings"""
+    if not (strain_data.get('name') or '').strip():
+        raise Exception("Page had no strain name")
+    readings = []
+    for chem_type, group in [('Cannabinoid', 'cannabinoids'), ('Terpenoid', 'terpenoids')]:
+        for name, value in strain_data['chemical_content'][group].items():
+            name = compound_key(name)
+            readings.append((chem_type, name, parse_chemical_value(value, name)))
+    return readings
+
+
+class IngestPipeline:
+    """In-process scrape and ingest: fetch -> normalize -> store -> graph-index
+
+    Stages are joined by bounded asyncio queues and each runs its own number of
+    workers, so a slow stage fills its queue and blocks the one upstream
+    instead of piling work up in memory. Only fetch touches the browser: it
+    opens, extracts and closes each page inside one crawl slot, so open pages
+    never outnumber the controller's window. Normalizing, file writes and
+    graph updates run in threads on the extracted record.
+    """
+
+    def __init__(self, sink=None, controller=None, graph=None, base_url=BASE_URL, workers=None,
+                 queue_size=DEFAULT_QUEUE_SIZE):
+        self.sink = sink or CsvDirSink('plants')
+        self.controller = controller or create_controller()
+        self.graph = graph
+        self.base_url = base_url
+        self.workers = dict(DEFAULT_WORKERS, fetch=self.controller.window.maximum)
+        self.workers.update(workers or {})
+        self.queue_size = queue_size
+        self.queues = None
+        self.tasks = []
+        self.playwright = None
+        self.browser = None
+        self.start_lock = None
+        self.in_flight = {}
+        self.loop = None
+        self.stats = {stage: 0 for stage in STAGES}
+        self.failures = 0
+
+    async def start(self):
+        """Launch the browser and the stage workers on the running loop"""
+        if self.start_lock is None:
+            self.start_lock = asyncio.Lock()
+        async with self.start_lock:
+            if self.browser is not None:
+                return
+            self.playwright = await async_playwright().start()
+            try:
+                self.browser = await self.playwright.chromium.launch(headless=True)
+            except Exception:
+                await self.playwright.stop()
+                self.playwright = None
+                raise
+
+            self.queues = {stage: asyncio.Queue(self.queue_size) for stage in STAGES}
+            handlers = {
+                'fetch': self.fetch,
+                'normalize': self.normalize,
+                'store': self.store,
+                'index': self.index
+            }
+            for stage in STAGES:
+                for _ in range(self.workers[stage]):
+                    self.tasks.append(asyncio.create_task(self.run_stage(stage, handlers[stage])))
+
+    async def close(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        for job in list(self.in_flight.values()):
+            job.future.cancel()
+        if self.browser is not None:
+            await self.browser.close()
+            await self.playwright.stop()
+            self.browser = None
+            self.playwright = None
+
+    async def run_stage(self, stage, handler):
+        queue = self.queues[stage]
+        position = STAGES.index(stage)
+        next_queue = self.queues[STAGES[position + 1]] if position + 1 < len(STAGES) else None
+        while True:
+            job = await queue.get()
+            try:
+                await handler(job)
+            except Exception as e:
+                print(f"Error in {stage} stage for {job.rsp_number}: {str(e)}")
+                self.fail(job, e)
+                continue
+            finally:
+                queue.task_done()
+
+            self.stats[stage] += 1
+            if next_queue is None:
+                if not job.future.done():
+                    job.future.set_result(job)
+            else:
+                # Blocks while the next stage is backed up
+                await next_queue.put(job)
+
+    def fail(self, job, error):
+        # Fetch closes its own pages, so there is nothing left open here
+        self.failures += 1
+        if not job.future.done():
+            job.future.set_exception(error)
+
+    async def fetch(self, job):
+        url = f"{self.base_url}{job.rsp_number}"
+
+        # The page is closed before the crawl slot is released, so the window caps open pages
+        async def fetch_page():
+            page = await self.browser.new_page()
+            try:
+                await load_strain_page(page, url)
+                return await page.evaluate(EXTRACT_STRAIN_DATA_JS)
+            finally:
+                await page.close()
+
+        job.strain_data = await self.controller.run(fetch_page)
+
+    async def normalize(self, job):
+        job.readings = await asyncio.to_thread(normalize_strain_data, job.strain_data)
+
+    async def store(self, job):
+        job.strain_dir = await asyncio.to_thread(self.sink.write, job.strain_data, job.rsp_number)
+        print("Saved", describe_strain_data(job.strain_data))
+
+    async def index(self, job):
+        # Sinks without per-strain folders (jsonl, consolidated) leave nothing for the live graph to read
+        if self.graph is not None and job.strain_dir:
+            root, dir = os.path.split(job.strain_dir)
+            try:
+                job.delta = await asyncio.to_thread(self.graph.apply_strain_folder, root, dir, job.readings)
+            except Exception as e:
+                print(f"!!! Error updating live graph: {e}")
+        print(f"Ingested {job.rsp_number} in {time.monotonic() - job.started:.1f}s")
+
+    async def submit(self, rsp_number):
+        """Queue an RSP number and return the future of its IngestJob, waiting while the pipeline is full
+
+        Submitting an RSP that is already in flight returns the existing job's future.
+        """
+        await self.start()
+        rsp_number = clean_rsp_number(rsp_number)
+        job = self.in_flight.get(rsp_number)
+        if job is not None:
+            return job.future
+
+        job = IngestJob(rsp_number)
+        self.in_flight[rsp_number] = job
+        job.future.add_done_callback(lambda _: self.in_flight.pop(rsp_number, None))
+        try:
+            await self.queues['fetch'].put(job)
+        except asyncio.CancelledError:
+            job.future.cancel()
+            raise
+        return job.future
+
+    async def ingest(self, rsp_number):
+        """Run one RSP number through every stage and return its finished IngestJob"""
+        future = await self.submit(rsp_number)
+        # Shield so one client disconnecting does not cancel the job for the others
+        return await asyncio.shield(future)
+
+    async def ingest_all(self, rsp_numbers):
+        """Feed RSP numbers in as fast as the pipeline takes them; returns the ones that failed
+
+        The iterable is consumed lazily and finished jobs are not kept, so
+        memory stays flat however long the batch is.
+        """
+        failed = []
+        outstanding = set()
+
+        def finished(future, rsp_number):
+            outstanding.discard(future)
+            if future.cancelled() or future.exception() is not None:
+                failed.append(rsp_number)
+
+        for rsp_number in rsp_numbers:
+            future = await self.submit(rsp_number)
+            if future not in outstanding:
+                outstanding.add(future)
+                future.add_done_callback(lambda f, rsp_number=rsp_number: finished(f, rsp_number))
+        if outstanding:
+            await asyncio.wait(set(outstanding))
+        return failed
+
+    def start_in_thread(self):
+        """Run the pipeline's event loop on a daemon thread, for callers that block (the threaded server)"""
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+
+    def ingest_from_thread(self, rsp_number):
+        """Blocking ingest() for code running outside the pipeline's loop"""
+        return asyncio.run_coroutine_threadsafe(self.ingest(rsp_number), self.loop).result()
+
+    def stop_thread(self):
+        """Close the browser and stop the loop started by start_in_thread"""
+        asyncio.run_coroutine_threadsafe(self.close(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+    def describe(self):
+        depths = ', '.join(
+            f"{stage} {self.queues[stage].qsize()}" for stage in STAGES
+        ) if self.queues else 'not started'
+        return (', '.join(f"{stage} {count}" for stage, count in self.stats.items())
+                + f", failures {self.failures}; queued: {depths}")
@@ -1,305 +1,252 @@
 import requests
-import os
 import argparse
 from bs4 import BeautifulSoup
-from playwright.async_api import async_playwright
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
 import asyncio
 import re
-import csv
 import sys
-import io
+from strain_sinks import CsvDirSink, create_sink
+from crawl_control import CrawlController, RetryableError, THROTTLE_STATUSES
 
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
-sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+# Reconfigure rather than rewrap, so importers (the servers) keep their line buffering
+sys.stdout.reconfigure(encoding='utf-8', errors='replace')
+sys.stderr.reconfigure(encoding='utf-8', errors='replace')
 
-async def scrape_strain_data(rsp_number):
+BASE_URL = "https://www.kannapedia.net/strains/"
+
+# Page script that pulls every section of a strain page into one dict
+EXTRACT_STRAIN_DATA_JS = """
+    () => {
+        const data = {
+            name: '',
+            general_info: {},
+            chemical_content: {
+                cannabinoids: {},
+                terpenoids: {}
+            },
+            genetic_relationships: {
+                all_samples: [],
+                base_tree: [],
+                most_distant: []
+            },
+            blockchain: {}
+        };
+        
+        // Get strain name
+        const titleElem = document.querySelector('h1.StrainInfo--title');
+        data.name = titleElem ? titleElem.textContent.trim() : '';
+        console.log('Found strain name:', data.name);
+        
+        // Get general information
+        const generalSection = Array.from(document.querySelectorAll('h2')).find(
+            h2 => h2.textContent.includes('General Information')
+        )?.parentElement;
+        
+        if (generalSection) {
+            const rows = generalSection.querySelectorAll('dt, dd');
+            for (let i = 0; i < rows.length; i += 2) {
+                if (rows[i] && rows[i + 1]) {
+                    const key = rows[i].textContent.trim();
+                    const value = rows[i + 1].textContent.trim();
+                    data.general_info[key] = value;
+                }
+            }
+        }
+        
+        // Get grower information
+        const growerText = document.querySelector('.StrainInfo--grower');
+        if (growerText) {
+            data.general_info['Grower'] = growerText.textContent.replace('Grower:', '').trim();
+        }
+        
+        // Get chemical content
+        const chemicalSection = Array.from(document.querySelectorAll('h2')).find(
+            h2 => h2.textContent.includes('Chemical Information')
+        )?.parentElement;
+        
+        if (chemicalSection) {
+            // Get Cannabinoids
+            const cannabinoidSection = Array.from(chemicalSection.querySelectorAll('h3')).find(
+                h3 => h3.textContent.includes('Cannabinoids')
+            );
+            if (cannabinoidSection) {
+                const items = Array.from(cannabinoidSection.parentElement.querySelectorAll('dt, dd'));
+                for (let i = 0; i < items.length; i += 2) {
+                    if (items[i] && items[i + 1]) {
+                        const name = items[i].textContent.trim();
+                        const value = items[i + 1].textContent.trim();
+                        if (value !== 'n/a' && !value.toLowerCase().includes('no information')) {
+                            data.chemical_content.cannabinoids[name] = value;
+                        }
+                    }
+                }
+            }
+            
+            // Get Terpenoids
+            const terpenoidSection = Array.from(chemicalSection.querySelectorAll('h3')).find(
+                h3 => h3.textContent.includes('Terpenoids')
+            );
+            if (terpenoidSection) {
+                const items = Array.from(terpenoidSection.parentElement.querySelectorAll('dt, dd'));
+                for (let i = 0; i < items.length; i += 2) {
+                    if (items[i] && items[i + 1]) {
+                        const name = items[i].textContent.trim();
+                        const value = items[i + 1].textContent.trim();
+                        if (value !== 'n/a' && !value.toLowerCase().includes('no information')) {
+                            data.chemical_content.terpenoids[name] = value;
+                        }
+                    }
+                }
+            }
+        }
+        
+        // Get heterozygosity
+        const heteroText = document.evaluate(
+            "//text()[contains(., 'Heterozygosity:')]",
+            document,
+            null,
+            XPathResult.FIRST_ORDERED_NODE_TYPE,
+            null
+        ).singleNodeValue;
+        if (heteroText) {
+            const match = heteroText.textContent.match(/Heterozygosity:\s*([\d.]+%)/);
+            if (match) {
+                data.general_info['Reported Heterozygosity'] = match[1];
+            }
+        }
+        
+        // Get rarity
+        const rarityText = document.evaluate(
+            "//text()[contains(., 'Rarity:')]",
+            document,
+            null,
+            XPathResult.FIRST_ORDERED_NODE_TYPE,
+            null
+        ).singleNodeValue;
+        if (rarityText) {
+            const match = rarityText.textContent.match(/Rarity:\s*(\w+)/);
+            if (match) {
+                data.general_info['Rarity'] = match[1];
+            }
+        }
+        
+        // Extract genetic relationships
+        const extractRelationships = (title) => {
+            const results = [];
+            const listItems = Array.from(document.querySelectorAll('li')).filter(li => {
+                const text = li.textContent.trim();
+                return text.match(/^\d+\.\d+\s+.+\(RSP\d+\)/);
+            });
+            
+            listItems.forEach(li => {
+                const text = li.textContent.trim();
+                const match = text.match(/^(\d+\.\d+)\s+(.+?)\s*\((RSP\d+)\)/i);
+                if (match) {
+                    results.push({
+                        distance: parseFloat(match[1]),
+                        strain: match[2].trim(),
+                        rsp: match[3].toLowerCase()
+                    });
+                }
+            });
+            return results;
+        };
+        
+        // Get all genetic relationships
+        const geneticSections = document.querySelectorAll('h3');
+        geneticSections.forEach(section => {
+            const title = section.textContent.trim().toLowerCase();
+            if (title.includes('all samples')) {
+                data.genetic_relationships.all_samples = extractRelationships(title);
+            } else if (title.includes('base tree')) {
+                data.genetic_relationships.base_tree = extractRelationships(title);
+            } else if (title.includes('most genetically distant')) {
+                data.genetic_relationships.most_distant = extractRelationships(title);
+            }
+        });
+        console.log('Found genetic relationships:', 
+            Object.keys(data.genetic_relationships).map(k => 
+                `${k}: ${data.genetic_relationships[k].length} items`
+            )
+        );
+        
+        // Get blockchain information
+        const txidElem = document.evaluate(
+            "//dt[contains(text(), 'Transaction ID')]/following-sibling::dd[1]",
+            document,
+            null,
+            XPathResult.FIRST_ORDERED_NODE_TYPE,
+            null
+        ).singleNodeValue;
+        if (txidElem) {
+            data.blockchain.txid = txidElem.textContent.trim();
+        }
+        
+        const shasumElem = document.evaluate(
+            "//dt[contains(text(), 'SHASUM Hash')]/following-sibling::dd[1]",
+            document,
+            null,
+            XPathResult.FIRST_ORDERED_NODE_TYPE,
+            null
+        ).singleNodeValue;
+        if (shasumElem) {
+            data.blockchain.shasum = shasumElem.textContent.trim();
+        }
+        console.log('Found blockchain info:', data.blockchain);
+        
+        console.log('Found general info:', data.general_info);
+        console.log('Found chemical content:', data.chemical_content);
+        
+        return data;
+    }
+"""
+
+async def load_strain_page(page, url, timeout=30000):
+    """Navigate an open browser page to a strain page and wait until its data has rendered"""
+    print(f"Loading page: {url}")
+    response = await page.goto(url, wait_until='networkidle', timeout=timeout)
+    if response is not None and response.status in THROTTLE_STATUSES:
+        retry_after = response.headers.get('retry-after', '')
+        raise RetryableError(f"HTTP {response.status} for {url}",
+                             float(retry_after) if retry_after.isdigit() else None)
+    if response is not None and response.status >= 400:
+        raise Exception(f"HTTP {response.status} for {url}")
+    await page.wait_for_selector('h1.StrainInfo--title', timeout=timeout)
+
+async def extract_strain_data(page, url, timeout=30000):
+    """Load a strain page in an open browser page and return the extracted strain_data dict"""
+    await load_strain_page(page, url, timeout)
+    
+    # Extract all data using JavaScript evaluation
+    return await page.evaluate(EXTRACT_STRAIN_DATA_JS)
+
+def describe_strain_data(strain_data):
+    """One-line summary of an extracted strain, used instead of printing the full dict"""
+    relationship_count = sum(len(rels) for rels in strain_data['genetic_relationships'].values())
+    chemical_count = sum(len(chems) for chems in strain_data['chemical_content'].values())
+    return (f"{strain_data['name']}: {len(strain_data['general_info'])} info fields, "
+            f"{chemical_count} chemicals, {relationship_count} relationships")
+
+def create_controller(**kwargs):
+    """CrawlController that treats Playwright timeouts as a signal to back off"""
+    return CrawlController(timeout_errors=(PlaywrightTimeoutError, asyncio.TimeoutError), **kwargs)
+
+async def scrape_strain_data(rsp_number, base_url=BASE_URL, sink=None, controller=None):
     """Scrape data for a specific strain using its RSP number"""
     print(f"Starting scrape for {rsp_number}")
-    base_url = "https://www.kannapedia.net/strains/"
     url = f"{base_url}{rsp_number}"
+    sink = sink or CsvDirSink('plants')
+    controller = controller or create_controller()
     
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=True)
         page = await browser.new_page()
         
         try:
-            print(f"Loading page: {url}")
-            await page.goto(url, wait_until='networkidle')
-            await page.wait_for_selector('h1.StrainInfo--title', timeout=30000)
-            
-            # Extract all data using JavaScript evaluation
-            strain_data = await page.evaluate("""
-                () => {
-                    const data = {
-                        name: '',
-                        general_info: {},
-                        chemical_content: {
-                            cannabinoids: {},
-                            terpenoids: {}
-                        },
-                        genetic_relationships: {
-                            all_samples: [],
-                            base_tree: [],
-                            most_distant: []
-                        },
-                        blockchain: {}
-                    };
-                    
-                    // Get strain name
-                    const titleElem = document.querySelector('h1.StrainInfo--title');
-                    data.name = titleElem ? titleElem.textContent.trim() : '';
-                    console.log('Found strain name:', data.name);
-                    
-                    // Get general information
-                    const generalSection = Array.from(document.querySelectorAll('h2')).find(
-                        h2 => h2.textContent.includes('General Information')
-                    )?.parentElement;
-                    
-                    if (generalSection) {
-                        const rows = generalSection.querySelectorAll('dt, dd');
-                        for (let i = 0; i < rows.length; i += 2) {
-                            if (rows[i] && rows[i + 1]) {
-                                const key = rows[i].textContent.trim();
-                                const value = rows[i + 1].textContent.trim();
-                                data.general_info[key] = value;
-                            }
-                        }
-                    }
-                    
-                    // Get grower information
-                    const growerText = document.querySelector('.StrainInfo--grower');
-                    if (growerText) {
-                        data.general_info['Grower'] = growerText.textContent.replace('Grower:', '').trim();
-                    }
-                    
-                    // Get chemical content
-                    const chemicalSection = Array.from(document.querySelectorAll('h2')).find(
-                        h2 => h2.textContent.includes('Chemical Information')
-                    )?.parentElement;
-                    
-                    if (chemicalSection) {
-                        // Get Cannabinoids
-                        const cannabinoidSection = Array.from(chemicalSection.querySelectorAll('h3')).find(
-                            h3 => h3.textContent.includes('Cannabinoids')
-                        );
-                        if (cannabinoidSection) {
-                            const items = Array.from(cannabinoidSection.parentElement.querySelectorAll('dt, dd'));
-                            for (let i = 0; i < items.length; i += 2) {
-                                if (items[i] && items[i + 1]) {
-                                    const name = items[i].textContent.trim();
-                                    const value = items[i + 1].textContent.trim();
-                                    if (value !== 'n/a' && !value.toLowerCase().includes('no information')) {
-                                        data.chemical_content.cannabinoids[name] = value;
-                                    }
-                                }
-                            }
-                        }
-                        
-                        // Get Terpenoids
-                        const terpenoidSection = Array.from(chemicalSection.querySelectorAll('h3')).find(
-                            h3 => h3.textContent.includes('Terpenoids')
-                        );
-                        if (terpenoidSection) {
-                            const items = Array.from(terpenoidSection.parentElement.querySelectorAll('dt, dd'));
-                            for (let i = 0; i < items.length; i += 2) {
-                                if (items[i] && items[i + 1]) {
-                                    const name = items[i].textContent.trim();
-                                    const value = items[i + 1].textContent.trim();
-                                    if (value !== 'n/a' && !value.toLowerCase().includes('no information')) {
-                                        data.chemical_content.terpenoids[name] = value;
-                                    }
-                                }
-                            }
-                        }
-                    }
-                    
-                    // Get heterozygosity
-                    const heteroText = document.evaluate(
-                        "//text()[contains(., 'Heterozygosity:')]",
-                        document,
-                        null,
-                        XPathResult.FIRST_ORDERED_NODE_TYPE,
-                        null
-                    ).singleNodeValue;
-                    if (heteroText) {
-                        const match = heteroText.textContent.match(/Heterozygosity:\s*([\d.]+%)/);
-                        if (match) {
-                            data.general_info['Reported Heterozygosity'] = match[1];
-                        }
-                    }
-                    
-                    // Get rarity
-                    const rarityText = document.evaluate(
-                        "//text()[contains(., 'Rarity:')]",
-                        document,
-                        null,
-                        XPathResult.FIRST_ORDERED_NODE_TYPE,
-                        null
-                    ).singleNodeValue;
-                    if (rarityText) {
-                        const match = rarityText.textContent.match(/Rarity:\s*(\w+)/);
-                        if (match) {
-                            data.general_info['Rarity'] = match[1];
-                        }
-                    }
-                    
-                    // Extract genetic relationships
-                    const extractRelationships = (title) => {
-                        const results = [];
-                        const listItems = Array.from(document.querySelectorAll('li')).filter(li => {
-                            const text = li.textContent.trim();
-                            return text.match(/^\d+\.\d+\s+.+\(RSP\d+\)/);
-                        });
-                        
-                        listItems.forEach(li => {
-                            const text = li.textContent.trim();
-                            const match = text.match(/^(\d+\.\d+)\s+(.+?)\s*\((RSP\d+)\)/i);
-                            if (match) {
-                                results.push({
-                                    distance: parseFloat(match[1]),
-                                    strain: match[2].trim(),
-                                    rsp: match[3].toLowerCase()
-                                });
-                            }
-                        });
-                        return results;
-                    };
-                    
-                    // Get all genetic relationships
-                    const geneticSections = document.querySelectorAll('h3');
-                    geneticSections.forEach(section => {
-                        const title = section.textContent.trim().toLowerCase();
-                        if (title.includes('all samples')) {
-                            data.genetic_relationships.all_samples = extractRelationships(title);
-                        } else if (title.includes('base tree')) {
-                            data.genetic_relationships.base_tree = extractRelationships(title);
-                        } else if (title.includes('most genetically distant')) {
-                            data.genetic_relationships.most_distant = extractRelationships(title);
-                        }
-                    });
-                    console.log('Found genetic relationships:', 
-                        Object.keys(data.genetic_relationships).map(k => 
-                            `${k}: ${data.genetic_relationships[k].length} items`
-                        )
-                    );
-                    
-                    // Get blockchain information
-                    const txidElem = document.evaluate(
-                        "//dt[contains(text(), 'Transaction ID')]/following-sibling::dd[1]",
-                        document,
-                        null,
-                        XPathResult.FIRST_ORDERED_NODE_TYPE,
-                        null
-                    ).singleNodeValue;
-                    if (txidElem) {
-                        data.blockchain.txid = txidElem.textContent.trim();
-                    }
-                    
-                    const shasumElem = document.evaluate(
-                        "//dt[contains(text(), 'SHASUM Hash')]/following-sibling::dd[1]",
-                        document,
-                        null,
-                        XPathResult.FIRST_ORDERED_NODE_TYPE,
-                        null
-                    ).singleNodeValue;
-                    if (shasumElem) {
-                        data.blockchain.shasum = shasumElem.textContent.trim();
-                    }
-                    console.log('Found blockchain info:', data.blockchain);
-                    
-                    console.log('Found general info:', data.general_info);
-                    console.log('Found chemical content:', data.chemical_content);
-                    
-                    return data;
-                }
-            """)
-            
-            print("Extracted data:", str(strain_data).encode('utf-8', errors='replace').decode('utf-8'))
-            
-            # Create directory structure
-            strain_dir = os.path.join('plants', f"{strain_data['name'].replace(' ', '_')}-{rsp_number}")
-            os.makedirs(strain_dir, exist_ok=True)
-            
-            # Save metadata CSV
-            metadata_path = os.path.join(strain_dir, f"{strain_data['name'].replace(' ', '_')}.metadata.csv")
-            with open(metadata_path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(['Field', 'Value'])
-                for key, value in strain_data['general_info'].items():
-                    writer.writerow([key, value])
-            
-            # Save chemicals CSV
-            chemicals_path = os.path.join(strain_dir, f"{strain_data['name'].replace(' ', '_')}.chemicals.csv")
-            with open(chemicals_path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(['Type', 'Name', 'Value'])
-                for name, value in strain_data['chemical_content']['cannabinoids'].items():
-                    writer.writerow(['Cannabinoid', name, value])
-                for name, value in strain_data['chemical_content']['terpenoids'].items():
-                    writer.writerow(['Terpenoid', name, value])
-            
-            # Save variants CSV
-            variants_path = os.path.join(strain_dir, f"{strain_data['name'].replace(' ', '_')}.variants.csv")
-            with open(variants_path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(['Type', 'Distance', 'Strain', 'RSP'])
-                for rel_type in ['all_samples', 'base_tree', 'most_distant']:
-                    for rel in strain_data['genetic_relationships'][rel_type]:
-                        writer.writerow([rel_type, rel['distance'], rel['strain'], rel['rsp'].upper()])
-            
-            # Save summary text file
-            summary_path = os.path.join(strain_dir, f"{strain_data['name'].replace(' ', '_')}_summary.txt")
-            with open(summary_path, 'w', encoding='utf-8') as f:
-                f.write(f"{'='*80}\n")
-                f.write(f"{strain_data['name']} ({rsp_number.upper()}) Summary\n")
-                f.write(f"{'='*80}\n\n")
-                
-                # Write general information
-                f.write("GENERAL INFORMATION\n")
-                f.write(f"{'-'*80}\n")
-                for key, value in strain_data['general_info'].items():
-                    f.write(f"{key}: {value}\n")
-                f.write("\n")
-                
-                # Write chemical content
-                f.write("CHEMICAL CONTENT\n")
-                f.write(f"{'-'*80}\n")
-                f.write("Cannabinoids:\n")
-                for name, value in strain_data['chemical_content']['cannabinoids'].items():
-                    f.write(f"  {name}: {value}\n")
-                f.write("\nTerpenoids:\n")
-                for name, value in strain_data['chemical_content']['terpenoids'].items():
-                    f.write(f"  {name}: {value}\n")
-                f.write("\n")
-                
-                # Write genetic relationships
-                f.write("GENETIC RELATIONSHIPS\n")
-                f.write(f"{'-'*80}\n")
-                
-                f.write("Nearest Genetic Relatives (All Samples):\n")
-                for rel in strain_data['genetic_relationships']['all_samples']:
-                    f.write(f"  {rel['distance']:.3f} - {rel['strain']} ({rel['rsp'].upper()})({rel['rsp']})\n")
-                f.write("\n")
-                
-                f.write("Nearest Genetic Relatives (Base Tree):\n")
-                for rel in strain_data['genetic_relationships']['base_tree']:
-                    f.write(f"  {rel['distance']:.3f} - {rel['strain']} ({rel['rsp'].upper()})({rel['rsp']})\n")
-                f.write("\n")
-                
-                if strain_data['genetic_relationships']['most_distant']:
-                    f.write("Most Genetically Distant Strains:\n")
-                    for rel in strain_data['genetic_relationships']['most_distant']:
-                        f.write(f"  {rel['distance']:.3f} - {rel['strain']} ({rel['rsp'].upper()})({rel['rsp']})\n")
-                f.write("\n")
-                
-                # Write blockchain information
-                f.write("BLOCKCHAIN INFORMATION\n")
-                f.write(f"{'-'*80}\n")
-                if strain_data['blockchain'].get('txid'):
-                    f.write(f"Transaction ID: {strain_data['blockchain']['txid']}\n")
-                if strain_data['blockchain'].get('shasum'):
-                    f.write(f"SHASUM Hash: {strain_data['blockchain']['shasum']}\n")
+            strain_data = await controller.run(lambda: extract_strain_data(page, url))
+            print("Extracted", describe_strain_data(strain_data))
             
+            sink.write(strain_data, rsp_number)
             print(f"Saved all data for {strain_data['name']}")
             await browser.close()
             return True
@@ -312,22 +259,80 @@ async def scrape_strain_data(rsp_number):
             await browser.close()
             raise
 
+async def scrape_strains(rsp_numbers, sink, base_url=BASE_URL, controller=None):
+    """Scrape many strains through one browser, handing each record to the sink as soon as it is extracted
+    
+    Runs on the ingest pipeline, so page loads overlap with parsing and file
+    writes; the controller's window caps how many pages are open at once and
+    its rate how fast new ones start.
+    """
+    from ingest_pipeline import IngestPipeline
+    pipeline = IngestPipeline(sink, controller or create_controller(), base_url=base_url)
+    try:
+        failed = await pipeline.ingest_all(rsp_numbers)
+    finally:
+        await pipeline.close()
+    
+    print(f"Crawl finished: {pipeline.controller.describe()}")
+    print(f"Pipeline: {pipeline.describe()}")
+    return failed
+
+def clean_rsp_number(value):
+    """Normalise user input like '10066', 'RSP10066' or 'rsp10066' to 'rsp10066'"""
+    rsp_number = value.lower()
+    if not rsp_number.startswith('rsp'):
+        rsp_number = 'rsp' + rsp_number.replace('rsp', '')
+    return rsp_number
+
+def read_rsp_file(path):
+    """Yield cleaned RSP numbers from a file with one per line"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield clean_rsp_number(line.strip())
+
 def main():
     parser = argparse.ArgumentParser(description="Scrape strain data from Kannapedia")
-    parser.add_argument('-u', '--url', required=True, help='RSP number of the strain to scrape')
+    parser.add_argument('-u', '--url', nargs='+', help='RSP number(s) of the strain(s) to scrape')
+    parser.add_argument('--batch-file', help='File with one RSP number per line to scrape in batch mode')
+    parser.add_argument('--output', choices=['csv', 'jsonl', 'consolidated'], default='csv',
+                        help='csv: plants/ folders, jsonl: one append-only JSON file, consolidated: shared CSV tables')
+    parser.add_argument('--output-path', help='Directory or file for the chosen output (defaults per output type)')
+    parser.add_argument('--base-url', default=BASE_URL, help='Strain page prefix (point at a local stand-in for offline runs)')
+    parser.add_argument('--rate', type=float, default=1.0, help='Starting requests per second')
+    parser.add_argument('--max-rate', type=float, default=5.0, help='Upper bound the rate can grow to')
+    parser.add_argument('--max-concurrency', type=int, default=8, help='Upper bound on pages in flight')
+    parser.add_argument('--target-latency', type=float, default=5.0,
+                        help='Page loads slower than this (seconds) shrink the concurrency window')
+    parser.add_argument('--retries', type=int, default=4, help='Retries per strain for timeouts and HTTP 429/5xx')
     args = parser.parse_args()
     
-    # Clean the RSP number
-    rsp_number = args.url.lower()
-    if not rsp_number.startswith('rsp'):
-        rsp_number = 'rsp' + rsp_number.replace('rsp', '')
+    if not args.url and not args.batch_file:
+        parser.error('one of -u/--url or --batch-file is required')
     
     try:
-        asyncio.run(scrape_strain_data(rsp_number))
+        with create_sink(args.output, args.output_path) as sink:
+            controller = create_controller(
+                rate=args.rate,
+                max_rate=args.max_rate,
+                max_concurrency=args.max_concurrency,
+                target_latency=args.target_latency,
+                retries=args.retries
+            )
+            if args.url and len(args.url) == 1 and not args.batch_file:
+                asyncio.run(scrape_strain_data(clean_rsp_number(args.url[0]), args.base_url, sink, controller))
+                print("Scraping completed successfully")
+                return
+            
+            rsp_numbers = read_rsp_file(args.batch_file) if args.batch_file else map(clean_rsp_number, args.url)
+            failed = asyncio.run(scrape_strains(rsp_numbers, sink, args.base_url, controller))
+        if failed:
+            print(f"Failed to scrape {len(failed)} strains: {', '.join(failed)}")
+            sys.exit(1)
         print("Scraping completed successfully")
     except Exception as e:
         print(f"Error during scraping: {str(e)}")
         raise
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,167 @@
+import os
+import json
+import threading
+import urllib.parse
+
+import numpy as np
+
+NEIGHBOR_INDEX_DIR = '.neighbor_index'
+NEIGHBOR_KINDS = ['genetic', 'terpene']
+# Neighbours kept per RSP and kind, closest first
+TOP_K = 50
+
+
+def top_k_lists(size, sources, targets, distances, k):
+    """CSR arrays (offsets, targets, distances) holding the k closest targets of each source row
+
+    Pairs listed more than once keep their smallest distance.
+    """
+    sources = np.asarray(sources, dtype=np.int64)
+    targets = np.asarray(targets, dtype=np.int64)
+    distances = np.asarray(distances, dtype=np.float64)
+
+    # Collapse duplicate pairs onto their closest distance
+    order = np.lexsort((distances, targets, sources))
+    sources, targets, distances = sources[order], targets[order], distances[order]
+    first = np.ones(len(sources), dtype=bool)
+    first[1:] = (sources[1:] != sources[:-1]) | (targets[1:] != targets[:-1])
+    sources, targets, distances = sources[first], targets[first], distances[first]
+
+    # Closest first within each source, then cut every run at k
+    order = np.lexsort((targets, distances, sources))
+    sources, targets, distances = sources[order], targets[order], distances[order]
+    starts = np.concatenate([[0], np.cumsum(np.bincount(sources, minlength=size))])
+    keep = np.arange(len(sources)) - starts[sources] < k
+    sources, targets, distances = sources[keep], targets[keep], distances[keep]
+
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(sources, minlength=size))]).astype(np.int64)
+    return offsets, targets.astype(np.int32), distances
+
+
+def build_neighbor_index(path, strains_data, representatives, all_relationships, terpene_relationships, k=TOP_K):
+    """Write per-RSP top-k genetic and terpene neighbour lists to `path` as .npy arrays
+
+    Each kind is three arrays: int64 offsets (one per RSP plus one), int32
+    target rows and float64 distances, so the neighbours of row i are the
+    slice offsets[i]:offsets[i + 1]. Distances stay float64 so the browser's
+    distance thresholds see exactly the values they used to. rsps.json maps
+    rows to RSP numbers and the node id the browser shows for each
+    (`representatives`, as returned by choose_representatives).
+    """
+    rsps = sorted(representatives)
+    row_of = {rsp: row for row, rsp in enumerate(rsps)}
+
+    def rows_for(relationships):
+        sources, targets, distances = [], [], []
+        for strain1, strain2, distance in relationships:
+            row1 = row_of.get(strains_data.get(strain1, {}).get('rsp', '').upper())
+            row2 = row_of.get(strains_data.get(strain2, {}).get('rsp', '').upper())
+            if row1 is None or row2 is None or row1 == row2:
+                continue
+            # Neighbour lists are symmetric
+            sources += [row1, row2]
+            targets += [row2, row1]
+            distances += [distance, distance]
+        return sources, targets, distances
+
+    os.makedirs(path, exist_ok=True)
+    edges = {
+        'genetic': all_relationships,
+        'terpene': ((rel['from'], rel['to'], rel['distance']) for rel in terpene_relationships)
+    }
+    for kind in NEIGHBOR_KINDS:
+        offsets, targets, distances = top_k_lists(len(rsps), *rows_for(edges[kind]), k)
+        np.save(os.path.join(path, f"{kind}.offsets.npy"), offsets)
+        np.save(os.path.join(path, f"{kind}.targets.npy"), targets)
+        np.save(os.path.join(path, f"{kind}.distances.npy"), distances)
+
+    with open(os.path.join(path, 'rsps.json'), 'w', encoding='utf-8') as f:
+        json.dump([[rsp, representatives[rsp]['name']] for rsp in rsps], f)
+    print(f"Indexed neighbours for {len(rsps)} RSP numbers (top {k})")
+
+
+class NeighborIndex:
+    """Memory-mapped neighbour lists written by build_neighbor_index
+
+    A lookup is a dict hit plus one array slice, independent of corpus size.
+    Strains scraped after the index was built are kept in a small in-memory
+    overlay fed with the LiveGraph deltas.
+    """
+
+    def __init__(self, path=NEIGHBOR_INDEX_DIR, k=TOP_K):
+        self.k = k
+        with open(os.path.join(path, 'rsps.json'), 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+        self.rsps = [rsp for rsp, _ in entries]
+        self.ids = [node_id for _, node_id in entries]
+        self.row_of = {rsp: row for row, rsp in enumerate(self.rsps)}
+        self.row_of_id = {node_id: row for row, node_id in enumerate(self.ids)}
+
+        self.arrays = {
+            kind: tuple(
+                np.load(os.path.join(path, f"{kind}.{part}.npy"), mmap_mode='r')
+                for part in ('offsets', 'targets', 'distances')
+            )
+            for kind in NEIGHBOR_KINDS
+        }
+        # overlay[kind][row] is a sorted [(distance, target_row), ...] that replaces the mapped list
+        self.overlay = {kind: {} for kind in NEIGHBOR_KINDS}
+        self.lock = threading.Lock()
+
+    def neighbors(self, row, kind):
+        """[(distance, target_row), ...] closest first"""
+        overlay = self.overlay[kind].get(row)
+        if overlay is not None:
+            return overlay
+        offsets, targets, distances = self.arrays[kind]
+        if row >= len(offsets) - 1:
+            return []
+        start, end = offsets[row], offsets[row + 1]
+        return list(zip(distances[start:end].tolist(), targets[start:end].tolist()))
+
+    def lookup(self, rsp):
+        """JSON-ready neighbour lists for an RSP number"""
+        row = self.row_of.get(rsp.upper())
+        if row is None:
+            raise Exception(f"No neighbours indexed for {rsp}")
+        result = {'rsp': self.rsps[row], 'id': self.ids[row]}
+        for kind in NEIGHBOR_KINDS:
+            result[kind] = [
+                {'id': self.ids[target], 'rsp': self.rsps[target], 'distance': distance}
+                for distance, target in self.neighbors(row, kind)
+            ]
+        return result
+
+    def add_row(self, rsp, node_id):
+        row = self.row_of.get(rsp)
+        if row is None:
+            row = len(self.rsps)
+            self.rsps.append(rsp)
+            self.ids.append(node_id)
+            self.row_of[rsp] = row
+            self.row_of_id[node_id] = row
+        return row
+
+    def add_edge(self, kind, row1, row2, distance):
+        for source, target in ((row1, row2), (row2, row1)):
+            entries = {t: d for d, t in self.neighbors(source, kind)}
+            entries[target] = min(distance, entries.get(target, distance))
+            self.overlay[kind][source] = sorted((d, t) for t, d in entries.items())[:self.k]
+
+    def apply_delta(self, delta):
+        """Fold a LiveGraph delta into the overlay"""
+        with self.lock:
+            for node in delta['nodes']:
+                if node['rsp']:
+                    self.add_row(node['rsp'].upper(), node['id'])
+            for kind, key in (('genetic', 'relationships'), ('terpene', 'terpeneRelationships')):
+                for rel in delta[key]:
+                    row1, row2 = self.row_of_id.get(rel['from']), self.row_of_id.get(rel['to'])
+                    if row1 is not None and row2 is not None and row1 != row2:
+                        self.add_edge(kind, row1, row2, rel['distance'])
+
+
+def neighbors_payload(index, path):
+    """JSON payload for a /neighbors/<rsp> request"""
+    rsp = urllib.parse.unquote(urllib.parse.urlsplit(path).path.split('/neighbors/')[1])
+    return dict(index.lookup(rsp), success=True)
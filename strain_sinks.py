@@ -0,0 +1,263 @@
+import os
+import io
+import csv
+import json
+
+RELATIONSHIP_TYPES = ['all_samples', 'base_tree', 'most_distant']
+
+# Summary headings for each relationship list, in the order they are written
+RELATIONSHIP_TITLES = {
+    'all_samples': 'Nearest Genetic Relatives (All Samples):',
+    'base_tree': 'Nearest Genetic Relatives (Base Tree):',
+    'most_distant': 'Most Genetically Distant Strains:'
+}
+
+# metadata.csv fields holding the blockchain ids, kept apart from the page's general information
+BLOCKCHAIN_FIELDS = {'txid': 'Blockchain Transaction ID', 'shasum': 'Blockchain SHASUM Hash'}
+# Lines of the _summary.txt files older scrapes wrote, the only place those kept blockchain ids
+LEGACY_BLOCKCHAIN_LINES = {'txid': 'Transaction ID: ', 'shasum': 'SHASUM Hash: '}
+
+
+def strain_base_name(strain_data):
+    """File name prefix used for a strain's files"""
+    return strain_data['name'].replace(' ', '_')
+
+
+def write_summary(f, strain_data, rsp_number):
+    """Write the human readable strain summary text"""
+    f.write(f"{'='*80}\n")
+    f.write(f"{strain_data['name']} ({rsp_number.upper()}) Summary\n")
+    f.write(f"{'='*80}\n\n")
+
+    # Write general information
+    f.write("GENERAL INFORMATION\n")
+    f.write(f"{'-'*80}\n")
+    for key, value in strain_data['general_info'].items():
+        f.write(f"{key}: {value}\n")
+    f.write("\n")
+
+    # Write chemical content
+    f.write("CHEMICAL CONTENT\n")
+    f.write(f"{'-'*80}\n")
+    f.write("Cannabinoids:\n")
+    for name, value in strain_data['chemical_content']['cannabinoids'].items():
+        f.write(f"  {name}: {value}\n")
+    f.write("\nTerpenoids:\n")
+    for name, value in strain_data['chemical_content']['terpenoids'].items():
+        f.write(f"  {name}: {value}\n")
+    f.write("\n")
+
+    # Write genetic relationships
+    f.write("GENETIC RELATIONSHIPS\n")
+    f.write(f"{'-'*80}\n")
+    for rel_type in RELATIONSHIP_TYPES:
+        relationships = strain_data['genetic_relationships'].get(rel_type, [])
+        # The most distant section is only written when the page had one
+        if rel_type != 'most_distant' or relationships:
+            f.write(f"{RELATIONSHIP_TITLES[rel_type]}\n")
+        for rel in relationships:
+            f.write(f"  {rel['distance']:.3f} - {rel['strain']} ({rel['rsp'].upper()})({rel['rsp'].lower()})\n")
+        f.write("\n")
+
+    # Write blockchain information
+    f.write("BLOCKCHAIN INFORMATION\n")
+    f.write(f"{'-'*80}\n")
+    if strain_data['blockchain'].get('txid'):
+        f.write(f"Transaction ID: {strain_data['blockchain']['txid']}\n")
+    if strain_data['blockchain'].get('shasum'):
+        f.write(f"SHASUM Hash: {strain_data['blockchain']['shasum']}\n")
+
+
+def render_summary(strain_data, rsp_number):
+    """Return the summary text for a strain, built from its strain_data"""
+    buffer = io.StringIO()
+    write_summary(buffer, strain_data, rsp_number)
+    return buffer.getvalue()
+
+
+def read_strain_dir(strain_dir, base_name, strain_name=None):
+    """Rebuild a strain_data dict from the structured CSV files in a plants/ folder
+
+    Folders scraped before the blockchain ids moved into metadata.csv only
+    have them in _summary.txt, so they are read from there as a fallback.
+    """
+    strain_data = {
+        'name': strain_name or base_name.replace('_', ' '),
+        'general_info': {},
+        'chemical_content': {'cannabinoids': {}, 'terpenoids': {}},
+        'genetic_relationships': {rel_type: [] for rel_type in RELATIONSHIP_TYPES},
+        'blockchain': {}
+    }
+
+    blockchain_keys = {field: key for key, field in BLOCKCHAIN_FIELDS.items()}
+    metadata_file = os.path.join(strain_dir, f"{base_name}.metadata.csv")
+    if os.path.exists(metadata_file):
+        with open(metadata_file, 'r', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                if row.get('Field') in blockchain_keys:
+                    strain_data['blockchain'][blockchain_keys[row['Field']]] = row.get('Value', '')
+                elif row.get('Field'):
+                    strain_data['general_info'][row['Field']] = row.get('Value', '')
+
+    legacy_summary = os.path.join(strain_dir, f"{base_name}_summary.txt")
+    if not strain_data['blockchain'] and os.path.exists(legacy_summary):
+        with open(legacy_summary, 'r', encoding='utf-8') as f:
+            for line in f:
+                for key, prefix in LEGACY_BLOCKCHAIN_LINES.items():
+                    if line.startswith(prefix):
+                        strain_data['blockchain'][key] = line[len(prefix):].strip()
+
+    chemicals_file = os.path.join(strain_dir, f"{base_name}.chemicals.csv")
+    if os.path.exists(chemicals_file):
+        with open(chemicals_file, 'r', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                if row.get('Name'):
+                    group = 'cannabinoids' if row.get('Type') == 'Cannabinoid' else 'terpenoids'
+                    strain_data['chemical_content'][group][row['Name']] = row.get('Value', '')
+
+    variants_file = os.path.join(strain_dir, f"{base_name}.variants.csv")
+    if os.path.exists(variants_file):
+        with open(variants_file, 'r', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                if row.get('Type') in strain_data['genetic_relationships'] and row.get('Distance'):
+                    strain_data['genetic_relationships'][row['Type']].append({
+                        'distance': float(row['Distance']),
+                        'strain': row['Strain'],
+                        'rsp': row['RSP'].lower()
+                    })
+
+    return strain_data
+
+
+class StrainSink:
+    """Destination for scraped strain records, written one strain at a time"""
+
+    def write(self, strain_data, rsp_number):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+
+class CsvDirSink(StrainSink):
+    """Writes the per-strain plants/<Name>-<rsp>/ folder layout"""
+
+    def __init__(self, output_dir='plants'):
+        self.output_dir = output_dir
+
+    def write(self, strain_data, rsp_number):
+        base_name = strain_base_name(strain_data)
+        strain_dir = os.path.join(self.output_dir, f"{base_name}-{rsp_number}")
+        os.makedirs(strain_dir, exist_ok=True)
+
+        # Save metadata CSV
+        with open(os.path.join(strain_dir, f"{base_name}.metadata.csv"), 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Field', 'Value'])
+            for key, value in strain_data['general_info'].items():
+                writer.writerow([key, value])
+            for key, field in BLOCKCHAIN_FIELDS.items():
+                if strain_data['blockchain'].get(key):
+                    writer.writerow([field, strain_data['blockchain'][key]])
+
+        # Save chemicals CSV
+        with open(os.path.join(strain_dir, f"{base_name}.chemicals.csv"), 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Type', 'Name', 'Value'])
+            for name, value in strain_data['chemical_content']['cannabinoids'].items():
+                writer.writerow(['Cannabinoid', name, value])
+            for name, value in strain_data['chemical_content']['terpenoids'].items():
+                writer.writerow(['Terpenoid', name, value])
+
+        # Save variants CSV; the summary text is rendered from these files on request
+        with open(os.path.join(strain_dir, f"{base_name}.variants.csv"), 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Type', 'Distance', 'Strain', 'RSP'])
+            for rel_type in RELATIONSHIP_TYPES:
+                for rel in strain_data['genetic_relationships'].get(rel_type, []):
+                    writer.writerow([rel_type, rel['distance'], rel['strain'], rel['rsp'].upper()])
+
+        return strain_dir
+
+
+class JsonlSink(StrainSink):
+    """Appends one JSON object per strain to a single file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'a', encoding='utf-8')
+
+    def write(self, strain_data, rsp_number):
+        record = dict(strain_data, rsp=rsp_number.upper())
+        self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class ConsolidatedSink(StrainSink):
+    """Appends every strain to three shared CSV tables (strains, chemicals, relationships)"""
+
+    TABLES = {
+        'strains': ['RSP', 'Name', 'Field', 'Value'],
+        'chemicals': ['RSP', 'Type', 'Name', 'Value'],
+        'relationships': ['RSP', 'Type', 'Distance', 'Strain', 'Related RSP']
+    }
+
+    def __init__(self, output_dir):
+        os.makedirs(output_dir, exist_ok=True)
+        self.files = {}
+        self.writers = {}
+        for table, header in self.TABLES.items():
+            path = os.path.join(output_dir, f"{table}.csv")
+            is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+            self.files[table] = open(path, 'a', newline='', encoding='utf-8')
+            self.writers[table] = csv.writer(self.files[table])
+            if is_new:
+                self.writers[table].writerow(header)
+
+    def write(self, strain_data, rsp_number):
+        rsp_number = rsp_number.upper()
+        name = strain_data['name']
+
+        strains = self.writers['strains']
+        for key, value in strain_data['general_info'].items():
+            strains.writerow([rsp_number, name, key, value])
+        for key, value in strain_data['blockchain'].items():
+            strains.writerow([rsp_number, name, key, value])
+
+        chemicals = self.writers['chemicals']
+        for chem, value in strain_data['chemical_content']['cannabinoids'].items():
+            chemicals.writerow([rsp_number, 'Cannabinoid', chem, value])
+        for chem, value in strain_data['chemical_content']['terpenoids'].items():
+            chemicals.writerow([rsp_number, 'Terpenoid', chem, value])
+
+        relationships = self.writers['relationships']
+        for rel_type in RELATIONSHIP_TYPES:
+            for rel in strain_data['genetic_relationships'].get(rel_type, []):
+                relationships.writerow([rsp_number, rel_type, rel['distance'], rel['strain'], rel['rsp'].upper()])
+
+        for f in self.files.values():
+            f.flush()
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+
+
+def create_sink(kind, path=None):
+    """Build a sink from a CLI style name: csv, jsonl or consolidated"""
+    if kind == 'csv':
+        return CsvDirSink(path or 'plants')
+    if kind == 'jsonl':
+        return JsonlSink(path or 'strains.jsonl')
+    if kind == 'consolidated':
+        return ConsolidatedSink(path or 'strain_store')
+    raise ValueError(f"Unknown output type: {kind}")
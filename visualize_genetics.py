@@ -13,13 +13,70 @@ import webbrowser
 import urllib.parse
 from tqdm import tqdm
 import time
-import sys
+import argparse
+import queue
+from strain_sinks import read_strain_dir, render_summary
+from graph_clusters import BadViewRequest, ClusterHierarchy, graph_view_payload
+from neighbor_index import NeighborIndex, build_neighbor_index, neighbors_payload, NEIGHBOR_INDEX_DIR
+from chemistry import (
+    ChemicalMatrix, MATRIX_CACHE_FILE, MIN_TERPENE_TOTAL, build_chemical_matrix,
+    load_chemical_matrix, read_chemicals_file, terpene_distances
+)
+
+RSP_NUMBER_PATTERN = re.compile(r'RSP\d+')
 
 def extract_ref_number(strain_info):
     """Extract RSP number from strain info string"""
-    match = re.search(r'RSP\d+', strain_info)
+    match = RSP_NUMBER_PATTERN.search(strain_info)
     return match.group(0) if match else None
 
+def read_strain_folder(root, dir):
+    """Read one scraped strain folder
+    
+    Returns (strain_name, info, relationships) where relationships is a list of
+    (strain_name, related_strain, distance, related_rsp) tuples from variants.csv.
+    """
+    # Clean strain name by removing extra spaces
+    strain_name = ' '.join(dir.split('-')[0].strip().split())
+    
+    # Check if this is a successfully scraped strain
+    metadata_file = os.path.join(root, dir, f"{strain_name.replace(' ', '_')}.metadata.csv")
+    chemicals_file = os.path.join(root, dir, f"{strain_name.replace(' ', '_')}.chemicals.csv")
+    variants_file = os.path.join(root, dir, f"{strain_name.replace(' ', '_')}.variants.csv")
+    
+    # Extract RSP number from directory name
+    rsp_match = re.search(r'-rsp(\d+)', dir.lower())
+    rsp = f"RSP{rsp_match.group(1)}" if rsp_match else ''
+    
+    # Mark strain as complete if all files exist and have data
+    is_complete = all([
+        os.path.exists(f) and os.path.getsize(f) > 0 
+        for f in [metadata_file, chemicals_file, variants_file]
+    ])
+    
+    info = {
+        'complete': is_complete,
+        'rsp': rsp,
+        'dir_name': dir
+    }
+    
+    # Add relationships if they exist
+    relationships = []
+    if os.path.exists(variants_file):
+        with open(variants_file, 'r') as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                if row.get('Distance') and row.get('Strain'):
+                    # Clean relationship strain name
+                    rel_strain = ' '.join(row['Strain'].strip().split())
+                    relationships.append((strain_name, rel_strain, float(row['Distance']), row.get('RSP', '')))
+    
+    # Chemistry is parsed for all strains at once into a ChemicalMatrix
+    if os.path.exists(chemicals_file):
+        info['chemicals_file'] = chemicals_file
+    
+    return strain_name, info, relationships
+
 def load_strain_data(folder_path):
     """Load genetic relationship data from all strain folders and their relationships"""
     strains_data = {}
@@ -29,116 +86,29 @@ def load_strain_data(folder_path):
     for root, dirs, files in os.walk(folder_path):
         for dir in dirs:
             if not dir.startswith('.'):  # Skip hidden directories
-                # Clean strain name by removing extra spaces
-                strain_name = ' '.join(dir.split('-')[0].strip().split())
-                
-                # Check if this is a successfully scraped strain
-                metadata_file = os.path.join(root, dir, f"{strain_name.replace(' ', '_')}.metadata.csv")
-                chemicals_file = os.path.join(root, dir, f"{strain_name.replace(' ', '_')}.chemicals.csv")
-                variants_file = os.path.join(root, dir, f"{strain_name.replace(' ', '_')}.variants.csv")
-                
-                # Extract RSP number from directory name
-                rsp_match = re.search(r'-rsp(\d+)', dir.lower())
-                rsp = f"RSP{rsp_match.group(1)}" if rsp_match else ''
-                
-                # Mark strain as complete if all files exist and have data
-                is_complete = all([
-                    os.path.exists(f) and os.path.getsize(f) > 0 
-                    for f in [metadata_file, chemicals_file, variants_file]
-                ])
-                
-                strains_data[strain_name] = {
-                    'complete': is_complete,
-                    'rsp': rsp,
-                    'dir_name': dir
-                }
+                strain_name, info, relationships = read_strain_folder(root, dir)
+                strains_data[strain_name] = info
                 
-                # Add relationships if they exist
-                if os.path.exists(variants_file):
-                    with open(variants_file, 'r') as f:
-                        reader = csv.DictReader(f)
-                        for row in reader:
-                            if row.get('Distance') and row.get('Strain'):
-                                # Clean relationship strain name
-                                rel_strain = ' '.join(row['Strain'].strip().split())
-                                rel = (strain_name, rel_strain, float(row['Distance']))
-                                all_relationships.add(rel)
-                                
-                                # Add related strain to strains_data if not exists
-                                if rel_strain not in strains_data:
-                                    strains_data[rel_strain] = {
-                                        'complete': False,
-                                        'rsp': row.get('RSP', ''),
-                                        'dir_name': ''
-                                    }
-                
-                # Add terpene data if available
-                if os.path.exists(chemicals_file):
-                    with open(chemicals_file, 'r') as f:
-                        reader = csv.DictReader(f)
-                        terpenes = {}
-                        for row in reader:
-                            name = row.get('Name', '').lower()
-                            if ('terpene' in name or 
-                                any(t in name for t in ['myrcene', 'limonene', 'pinene', 'caryophyllene'])):
-                                # Strip percentage sign and convert to float
-                                value = row.get('Value', '0')
-                                value = value.strip().rstrip('%')  # Remove % sign and whitespace
-                                try:
-                                    terpenes[row['Name']] = float(value)
-                                except ValueError:
-                                    print(f"Warning: Could not convert value '{value}' to float for terpene {row['Name']}")
-                                    terpenes[row['Name']] = 0.0
-                        strains_data[strain_name]['terpenes'] = terpenes
+                for strain, rel_strain, distance, rel_rsp in relationships:
+                    all_relationships.add((strain, rel_strain, distance))
+                    
+                    # Add related strain to strains_data if not exists
+                    if rel_strain not in strains_data:
+                        strains_data[rel_strain] = {
+                            'complete': False,
+                            'rsp': rel_rsp,
+                            'dir_name': ''
+                        }
     
     return strains_data, all_relationships
 
-def parse_summary_relationships(content):
-    """Parse relationships from summary file content"""
-    relationships = {
-        'all_samples': {},
-        'base_tree': {},
-        'all_strains': set()
+def chemical_files(strains_data):
+    """{strain_name: chemicals.csv path} for every strain folder that has chemistry"""
+    return {
+        name: data['chemicals_file']
+        for name, data in strains_data.items()
+        if data.get('chemicals_file')
     }
-    
-    # Find the sections
-    all_samples_match = re.search(r'Nearest Genetic Relatives \(All Samples\):\n(.*?)\n\n', content, re.DOTALL)
-    base_tree_match = re.search(r'Nearest Genetic Relatives \(Base Tree\):\n(.*?)\n\n', content, re.DOTALL)
-    
-    if all_samples_match:
-        for line in all_samples_match.group(1).strip().split('\n'):
-            if line.strip():
-                parts = line.strip().split(' - ', 1)
-                if len(parts) == 2:
-                    distance = float(parts[0].strip())
-                    strain_info = parts[1].strip()
-                    # Store the full strain info including RSP number
-                    strain_name = strain_info.split('(')[0].strip()
-                    rsp_number = re.search(r'\((RSP\d+)\)', strain_info)
-                    if rsp_number:
-                        relationships['all_samples'][strain_name] = {
-                            'distance': distance,
-                            'rsp': rsp_number.group(1)
-                        }
-                        relationships['all_strains'].add(strain_info)
-    
-    if base_tree_match:
-        for line in base_tree_match.group(1).strip().split('\n'):
-            if line.strip():
-                parts = line.strip().split(' - ', 1)
-                if len(parts) == 2:
-                    distance = float(parts[0].strip())
-                    strain_info = parts[1].strip()
-                    strain_name = strain_info.split('(')[0].strip()
-                    rsp_number = re.search(r'\((RSP\d+)\)', strain_info)
-                    if rsp_number:
-                        relationships['base_tree'][strain_name] = {
-                            'distance': distance,
-                            'rsp': rsp_number.group(1)
-                        }
-                        relationships['all_strains'].add(strain_info)
-    
-    return relationships
 
 def create_distance_matrix(strains_data, all_relationships):
     """Create a distance matrix including all known relationships"""
@@ -186,16 +156,9 @@ def scrape_missing_strain(strain_info):
             return False
     return False
 
-def create_2d_visualization(strains_data, all_relationships, terpene_relationships):
-    """Create interactive visualization using Vis.js"""
-    # Create nodes and edges for Vis.js
-    nodes = []
-    relationships = []
-    
-    # Track RSP numbers to avoid duplicates
+def choose_representatives(strains_data):
+    """Pick one strain name per RSP number, preferring completely scraped strains"""
     seen_rsp = {}
-    
-    # First pass: Find completed nodes for each RSP
     for strain_name, data in strains_data.items():
         rsp = data.get('rsp', '').upper()
         if rsp:  # Only track nodes that have an RSP number
@@ -210,6 +173,29 @@ def create_2d_visualization(strains_data, all_relationships, terpene_relationshi
                     'name': strain_name,
                     'complete': True
                 }
+    return seen_rsp
+
+def build_node(strain_name, data):
+    """Vis.js node for a strain"""
+    return {
+        'id': strain_name,
+        'label': strain_name,
+        'title': f"{strain_name}<br>RSP: {data.get('rsp', '')}<br>{'Has full data' if data['complete'] else 'Click to scrape data'}",
+        'color': {
+            'background': '#2B7CE9' if data['complete'] else '#cccccc',
+            'border': '#2B7CE9' if data['complete'] else '#666666'
+        },
+        'rsp': data.get('rsp', ''),
+        'complete': data['complete']
+    }
+
+def build_graph_elements(strains_data, all_relationships):
+    """Vis.js nodes (one per RSP) and genetic relationships mapped onto those nodes"""
+    nodes = []
+    relationships = []
+    
+    # Track RSP numbers to avoid duplicates
+    seen_rsp = choose_representatives(strains_data)
 
     # Second pass: Create nodes, skipping duplicates
     for strain_name, data in strains_data.items():
@@ -219,17 +205,7 @@ def create_2d_visualization(strains_data, all_relationships, terpene_relationshi
         if rsp and seen_rsp[rsp]['name'] != strain_name:
             continue
             
-        nodes.append({
-            'id': strain_name,
-            'label': strain_name,
-            'title': f"{strain_name}<br>RSP: {data.get('rsp', '')}<br>{'Has full data' if data['complete'] else 'Click to scrape data'}",
-            'color': {
-                'background': '#2B7CE9' if data['complete'] else '#cccccc',
-                'border': '#2B7CE9' if data['complete'] else '#666666'
-            },
-            'rsp': data.get('rsp', ''),
-            'complete': data['complete']
-        })
+        nodes.append(build_node(strain_name, data))
     
     # Update relationships to use the chosen strain names
     for strain1, strain2, distance in all_relationships:
@@ -245,6 +221,13 @@ def create_2d_visualization(strains_data, all_relationships, terpene_relationshi
             'to': to_strain,
             'distance': distance
         })
+    
+    return nodes, relationships
+
+def create_2d_visualization(strains_data, all_relationships, terpene_relationships):
+    """Create interactive visualization using Vis.js"""
+    # Create nodes and edges for Vis.js
+    nodes, relationships = build_graph_elements(strains_data, all_relationships)
 
     # Read the HTML template
     with open('visualization_template.html', 'r', encoding='utf-8') as f:
@@ -272,161 +255,158 @@ def create_2d_visualization(strains_data, all_relationships, terpene_relationshi
     
     return html_content
 
-def calculate_terpene_relationships(strains_data):
+def terpene_profile(data, readings=None):
+    """PRIMARY_TERPENES profile for one strain folder, or None if it should not get terpene edges
+    
+    `readings` skips re-reading chemicals.csv when the caller already parsed it.
+    """
+    if not (data.get('chemicals_file') and data['complete']):
+        return None
+    if readings is None:
+        readings = read_chemicals_file(data['chemicals_file'])
+    chemistry = ChemicalMatrix.from_readings({'': readings})
+    profile = chemistry.terpene_profiles()[0]
+    # Only include strains with significant terpene content
+    return profile if profile.sum() > MIN_TERPENE_TOTAL else None
+
+def terpene_profiles(strains_data, chemistry):
+    """(names, profiles) for complete strains with significant terpene content, sorted by name"""
+    names = sorted(
+        name for name in chemistry.strains
+        if strains_data.get(name, {}).get('complete')
+    )
+    profiles = chemistry.terpene_profiles()[[chemistry.index[name] for name in names]]
+    keep = profiles.sum(axis=1) > MIN_TERPENE_TOTAL
+    return [name for name, kept in zip(names, keep) if kept], profiles[keep]
+
+# Strains must be at least 50% similar in their significant terpenes to get an edge
+TERPENE_DISTANCE_THRESHOLD = 0.5
+
+def calculate_terpene_relationships(strains_data, chemistry=None):
     """Calculate similarity relationships between strains based on their terpene profiles"""
+    if chemistry is None:
+        chemistry = build_chemical_matrix(chemical_files(strains_data))
     terpene_relationships = []
+    names, profiles = terpene_profiles(strains_data, chemistry)
     
-    # Define primary terpenes to focus on
-    PRIMARY_TERPENES = {
-        'myrcene': ['myrcene'],
-        'limonene': ['limonene', 'd-limonene'],
-        'caryophyllene': ['caryophyllene', 'β-caryophyllene', 'beta-caryophyllene'],
-        'pinene': ['α-pinene', 'beta-pinene', 'α-pinene', 'alpha-pinene'],
-        'terpinolene': ['terpinolene'],
-        'linalool': ['linalool'],
-        'humulene': ['humulene', 'α-humulene', 'alpha-humulene']
-    }
-    
-    # Get all strains with terpene data
-    strains_with_terpenes = {}
-    for name, data in strains_data.items():
-        if not (data.get('terpenes') and data['complete']):
-            continue
-            
-        # Normalize terpene names and combine similar terpenes
-        normalized_terpenes = {}
-        for terpene_name, value in data['terpenes'].items():
-            terpene_name = terpene_name.lower()
-            # Convert percentage string to float if needed
-            if isinstance(value, str):
-                value = float(value.strip('%'))
-                
-            # Map to primary terpene groups
-            for primary, variants in PRIMARY_TERPENES.items():
-                if any(variant in terpene_name for variant in variants):
-                    if primary not in normalized_terpenes:
-                        normalized_terpenes[primary] = 0
-                    normalized_terpenes[primary] += value
-                    break
+    # Names are sorted, so comparing each strain with the rows after it yields every from < to pair once
+    for row, strain1 in enumerate(names):
+        distances = terpene_distances(profiles[row], profiles[row + 1:])
         
-        # Only include strains with significant terpene content
-        if sum(normalized_terpenes.values()) > 0.1:  # At least 0.1% total terpenes
-            strains_with_terpenes[name] = normalized_terpenes
-    
-    # Calculate similarity between strains
-    for strain1, terpenes1 in strains_with_terpenes.items():
-        for strain2, terpenes2 in strains_with_terpenes.items():
-            if strain1 >= strain2:  # Skip duplicate pairs and self-comparisons
-                continue
-            
-            # Calculate similarity based on dominant terpenes
-            similarity_score = 0
-            total_weight = 0
-            
-            # Get all terpenes present in either strain
-            all_terpenes = set(terpenes1.keys()) | set(terpenes2.keys())
-            
-            for terpene in all_terpenes:
-                val1 = terpenes1.get(terpene, 0)
-                val2 = terpenes2.get(terpene, 0)
-                
-                # Skip if neither strain has significant amount of this terpene
-                if max(val1, val2) < 0.1:  # Less than 0.1% is considered trace amount
-                    continue
-                
-                # Calculate similarity for this terpene
-                diff = abs(val1 - val2)
-                max_val = max(val1, val2)
-                terpene_similarity = 1 - (diff / max(max_val, 0.1))  # Avoid division by zero
-                
-                # Weight the similarity by the maximum concentration
-                weight = max_val
-                similarity_score += terpene_similarity * weight
-                total_weight += weight
-            
-            # Calculate final weighted similarity
-            if total_weight > 0:
-                final_similarity = similarity_score / total_weight
-                
-                # Convert to distance (0 = identical, 1 = completely different)
-                distance = 1 - final_similarity
-                
-                # Only include relationships with meaningful similarity
-                # More strict threshold for terpene relationships
-                if distance < 0.5:  # Strains must be at least 50% similar in their significant terpenes
-                    terpene_relationships.append({
-                        'from': strain1,
-                        'to': strain2,
-                        'distance': distance
-                    })
+        # Only include relationships with meaningful similarity (NaN rows had nothing to compare)
+        for offset in np.flatnonzero(distances < TERPENE_DISTANCE_THRESHOLD):
+            terpene_relationships.append({
+                'from': strain1,
+                'to': names[row + 1 + offset],
+                'distance': float(distances[offset])
+            })
     
     return terpene_relationships
 
+def strain_payload(strain_data):
+    """Chemicals and metadata of a strain_data dict, in the shape the page renders"""
+    chemicals = [
+        {'Name': name, 'Value': value, 'Type': chem_type}
+        for chem_type, group in [('Cannabinoid', 'cannabinoids'), ('Terpenoid', 'terpenoids')]
+        for name, value in strain_data['chemical_content'][group].items()
+    ]
+    return {
+        'chemicals': chemicals,
+        'metadata': strain_data['general_info']
+    }
+
+def scrape_payload(job):
+    """JSON reply for a finished /scrape/ IngestJob
+    
+    `node_id` is the id the live graph gave the strain, which can differ from
+    its display name (folder-style names, or an existing node for the RSP).
+    """
+    return {
+        'success': True,
+        'strain_name': job.strain_data['name'],
+        'node_id': job.delta['nodes'][0]['id'] if job.delta else None,
+        'strain_data': strain_payload(job.strain_data)
+    }
+
+def get_strain_data(strain_name, rsp, include_summary=False):
+    """Read strain data from the structured files; the summary text is only produced on request"""
+    try:
+        print(f"\n=== Reading data for {strain_name} (RSP: {rsp}) ===")
+        
+        # Construct directory path - fix the path to look in current directory
+        dir_name = f"{strain_name.replace(' ', '_')}-{rsp.lower()}"
+        base_path = os.path.join('.', 'plants', dir_name)  # Changed path
+        print(f"Looking in directory: {base_path}")
+        
+        if not os.path.exists(base_path):
+            print(f"Directory not found: {base_path}")
+            return None
+        
+        base_name = strain_name.replace(' ', '_')
+        strain_data = read_strain_dir(base_path, base_name, strain_name)
+        
+        data = strain_payload(strain_data)
+        print(f"✓ Read {len(data['chemicals'])} chemical entries")
+        
+        if include_summary:
+            data['summary'] = render_summary(strain_data, rsp)
+            print("✓ Rendered summary")
+        
+        print("=== Successfully loaded all data ===\n")
+        return data
+        
+    except Exception as e:
+        print(f"\n!!! Error reading strain data: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+def parse_strain_data_path(path):
+    """Split a /strain_data/<name>|<rsp>[?summary=1] request path into (strain_name, rsp, include_summary)"""
+    url = urllib.parse.urlsplit(path)
+    path_parts = url.path.split('/strain_data/')[1]
+    strain_name, rsp = urllib.parse.unquote(path_parts).split('|')
+    include_summary = urllib.parse.parse_qs(url.query).get('summary') == ['1']
+    return strain_name, rsp, include_summary
+
 class ScraperHandler(SimpleHTTPRequestHandler):
-    def get_strain_data(self, strain_name, rsp):
+    # LiveGraph shared by all handler threads; set by main() so scrapes push graph deltas
+    graph = None
+    # ClusterHierarchy behind the /graph level-of-detail route; set by main()
+    clusters = None
+    # NeighborIndex behind the /neighbors/<rsp> route; set by main()
+    neighbors = None
+    # IngestPipeline running on its own loop thread, behind /scrape/; set by main()
+    pipeline = None
+    
+    def get_strain_data(self, strain_name, rsp, include_summary=False):
         """Read strain data from files"""
+        return get_strain_data(strain_name, rsp, include_summary)
+    
+    def stream_events(self):
+        """Hold the connection open and forward graph deltas as Server-Sent Events"""
+        if self.graph is None:
+            self.send_error(404)
+            return
+        
+        events = queue.Queue()
+        self.graph.broker.subscribe(events.put)
         try:
-            print(f"\n=== Reading data for {strain_name} (RSP: {rsp}) ===")
-            
-            # Construct directory path - fix the path to look in current directory
-            dir_name = f"{strain_name.replace(' ', '_')}-{rsp.lower()}"
-            base_path = os.path.join('.', 'plants', dir_name)  # Changed path
-            print(f"Looking in directory: {base_path}")
-            
-            if not os.path.exists(base_path):
-                print(f"Directory not found: {base_path}")
-                return None
-            
-            # Construct file paths
-            base_name = strain_name.replace(' ', '_')
-            summary_file = os.path.join(base_path, f"{base_name}_summary.txt")
-            chemicals_file = os.path.join(base_path, f"{base_name}.chemicals.csv")
-            metadata_file = os.path.join(base_path, f"{base_name}.metadata.csv")
-            
-            print(f"Checking files exist:")
-            print(f"Summary: {os.path.exists(summary_file)}")
-            print(f"Chemicals: {os.path.exists(chemicals_file)}")
-            print(f"Metadata: {os.path.exists(metadata_file)}")
-            
-            # Read summary file
-            with open(summary_file, 'r', encoding='utf-8') as f:
-                summary = f.read()
-                print("✓ Read summary file")
-            
-            # Read chemicals file
-            chemicals = []
-            with open(chemicals_file, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                chemicals = [
-                    {
-                        'Name': row['Name'],
-                        'Value': row['Value'],
-                        'Type': 'Cannabinoid' if 'THC' in row['Name'] or 'CBD' in row['Name'] 
-                               else 'Terpenoid'
-                    }
-                    for row in reader
-                ]
-                print(f"✓ Read {len(chemicals)} chemical entries")
-            
-            # Read metadata file
-            with open(metadata_file, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                metadata = next(reader)
-                print("✓ Read metadata")
-            
-            data = {
-                'summary': summary,
-                'chemicals': chemicals,
-                'metadata': metadata
-            }
-            print("=== Successfully loaded all data ===\n")
-            return data
-            
-        except Exception as e:
-            print(f"\n!!! Error reading strain data: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            return None
+            self.send_response(200)
+            self.send_header('Content-type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            while True:
+                try:
+                    message = events.get(timeout=15)
+                except queue.Empty:
+                    message = ': keep-alive\n\n'
+                self.wfile.write(message.encode())
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self.graph.broker.unsubscribe(events.put)
 
     def do_GET(self):
         print(f"\nGET request: {self.path}")
@@ -453,51 +433,70 @@ class ScraperHandler(SimpleHTTPRequestHandler):
                 self.send_error(500)
                 return
                 
+        elif urllib.parse.urlsplit(self.path).path == '/graph':
+            try:
+                if self.clusters is None:
+                    raise Exception("Clustering is not available")
+                payload = graph_view_payload(self.clusters, self.path)
+                self.send_response(200)
+                self.send_header('Content-type', 'application/json')
+                self.send_header('Access-Control-Allow-Origin', '*')
+                self.end_headers()
+                self.wfile.write(json.dumps(payload).encode())
+            except Exception as e:
+                print(f"!!! Error building graph view: {str(e)}")
+                self.send_response(400 if isinstance(e, BadViewRequest) else 500)
+                self.send_header('Content-type', 'application/json')
+                self.send_header('Access-Control-Allow-Origin', '*')
+                self.end_headers()
+                self.wfile.write(json.dumps({
+                    'success': False,
+                    'error': str(e)
+                }).encode())
+            return
+            
+        elif self.path.startswith('/neighbors/'):
+            try:
+                if self.neighbors is None:
+                    raise Exception("Neighbour index is not available")
+                payload = neighbors_payload(self.neighbors, self.path)
+                self.send_response(200)
+                self.send_header('Content-type', 'application/json')
+                self.send_header('Access-Control-Allow-Origin', '*')
+                self.end_headers()
+                self.wfile.write(json.dumps(payload).encode())
+            except Exception as e:
+                print(f"!!! Error looking up neighbours: {str(e)}")
+                self.send_response(500)
+                self.send_header('Content-type', 'application/json')
+                self.send_header('Access-Control-Allow-Origin', '*')
+                self.end_headers()
+                self.wfile.write(json.dumps({
+                    'success': False,
+                    'error': str(e)
+                }).encode())
+            return
+            
+        elif self.path == '/events':
+            self.stream_events()
+            return
+            
         elif self.path.startswith('/scrape/'):
             try:
-                rsp = self.path.split('/scrape/')[1]
+                rsp = urllib.parse.unquote(self.path.split('/scrape/')[1])
                 print(f"Scraping strain with RSP: {rsp}")
                 
-                # Get the absolute path to kaana_scraper.py
-                scraper_path = os.path.join(os.path.dirname(__file__), 'kaana_scraper.py')
+                if self.pipeline is None:
+                    raise Exception("Scraping is not available")
                 
-                # Run the scraper
-                process = subprocess.run(
-                    [sys.executable, scraper_path, '-u', rsp],
-                    capture_output=True,
-                    text=True,
-                    check=True
-                )
+                # Fetch, save and fold into the live graph in-process; blocks only this request's thread
+                job = self.pipeline.ingest_from_thread(rsp)
                 
-                if process.returncode == 0:
-                    # Find the newly created directory
-                    strain_dir = None
-                    strain_name = None
-                    
-                    for root, dirs, files in os.walk('./plants'):
-                        for dir in dirs:
-                            if rsp.lower() in dir.lower():
-                                strain_dir = dir
-                                strain_name = ' '.join(dir.split('-')[0].strip().split('_'))
-                                break
-                    
-                    if strain_dir and strain_name:
-                        # Get the strain data
-                        strain_data = self.get_strain_data(strain_name, rsp)
-                        
-                        self.send_response(200)
-                        self.send_header('Content-type', 'application/json')
-                        self.send_header('Access-Control-Allow-Origin', '*')
-                        self.end_headers()
-                        self.wfile.write(json.dumps({
-                            'success': True,
-                            'strain_name': strain_name,
-                            'strain_data': strain_data
-                        }).encode())
-                    else:
-                        raise Exception("Could not find scraped strain directory")
-                else:
-                    raise Exception(f"Scraper failed: {process.stderr}")
+                self.send_response(200)
+                self.send_header('Content-type', 'application/json')
+                self.send_header('Access-Control-Allow-Origin', '*')
+                self.end_headers()
+                self.wfile.write(json.dumps(scrape_payload(job)).encode())
                     
             except Exception as e:
                 print(f"Error during scraping: {str(e)}")
@@ -513,11 +512,10 @@ class ScraperHandler(SimpleHTTPRequestHandler):
                 
         elif self.path.startswith('/strain_data/'):
             try:
-                path_parts = self.path.split('/strain_data/')[1]
-                strain_name, rsp = urllib.parse.unquote(path_parts).split('|')
+                strain_name, rsp, include_summary = parse_strain_data_path(self.path)
                 print(f"\nRequested data for: {strain_name} (RSP: {rsp})")
                 
-                strain_data = self.get_strain_data(strain_name, rsp)
+                strain_data = self.get_strain_data(strain_name, rsp, include_summary)
                 if strain_data:
                     self.send_response(200)
                     self.send_header('Content-type', 'application/json')
@@ -555,16 +553,43 @@ def start_server(port=8000):
     return server
 
 def main():
+    parser = argparse.ArgumentParser(description="Build the strain visualization and serve it")
+    parser.add_argument('--server', choices=['threaded', 'async'], default='threaded',
+                        help='threaded: one thread per connection; async: single asyncio loop. Both scrape through one in-process ingest pipeline')
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+    
     print("\n=== Starting Visualization Server ===")
     print("Loading strain data...")
     strains_data, all_relationships = load_strain_data('.')
     print(f"Loaded data for {len(strains_data)} strains")
     print(f"Found {len(all_relationships)} total relationships")
     
+    print("\nParsing chemistry...")
+    chemistry = load_chemical_matrix(chemical_files(strains_data), os.path.join('.', MATRIX_CACHE_FILE))
+    
     print("\nCalculating terpene relationships...")
-    terpene_relationships = calculate_terpene_relationships(strains_data)
+    terpene_relationships = calculate_terpene_relationships(strains_data, chemistry)
     print(f"Found {len(terpene_relationships)} terpene relationships")
     
+    print("\nIndexing neighbours...")
+    build_neighbor_index(
+        NEIGHBOR_INDEX_DIR, strains_data, choose_representatives(strains_data),
+        all_relationships, terpene_relationships
+    )
+    neighbors = NeighborIndex(NEIGHBOR_INDEX_DIR)
+    ScraperHandler.neighbors = neighbors
+    
+    print("\nClustering genetic graph...")
+    clusters = ClusterHierarchy(*build_graph_elements(strains_data, all_relationships))
+    ScraperHandler.clusters = clusters
+    
+    # Server-side copy of the graph so scrapes can push deltas instead of a rebuild
+    from graph_updates import LiveGraph
+    graph = LiveGraph(strains_data, all_relationships, terpene_relationships, chemistry=chemistry,
+                      neighbors=neighbors, clusters=clusters)
+    ScraperHandler.graph = graph
+    
     print("\nCreating visualization...")
     html_content = create_2d_visualization(strains_data, all_relationships, terpene_relationships)
     
@@ -574,7 +599,21 @@ def main():
         f.write(html_content)
     
     # Start the server
-    port = 8000
+    port = args.port
+    if args.server == 'async':
+        from async_server import run_async_server
+        print(f"\nAsync server started at http://localhost:{port}")
+        print("Press Ctrl+C to stop the server")
+        webbrowser.open(f'http://localhost:{port}/visualization.html')
+        run_async_server(port, graph, clusters, neighbors)
+        return
+    
+    # Scrapes run through the ingest pipeline on its own loop thread, shared by all handler threads
+    from ingest_pipeline import IngestPipeline
+    pipeline = IngestPipeline(graph=graph)
+    pipeline.start_in_thread()
+    ScraperHandler.pipeline = pipeline
+    
     server = ThreadingHTTPServer(('', port), ScraperHandler)
     print(f"\nServer started at http://localhost:{port}")
     print("Press Ctrl+C to stop the server")
@@ -588,6 +627,7 @@ def main():
         print("\nShutting down server...")
         server.shutdown()
         server.server_close()
+        pipeline.stop_thread()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file